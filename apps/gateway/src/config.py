@@ -14,6 +14,9 @@ class Settings(BaseSettings):
 
     # Redis configuration
     redis_url: str = Field(default="redis://localhost:6379", env="REDIS_URL")
+    redis_max_connections: int = Field(
+        default=50, description="Maximum connections in the shared Redis connection pool"
+    )
 
     # SMS Provider configuration
     provider_rate_limit: int = Field(default=50, description="Requests per second per provider")
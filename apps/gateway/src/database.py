@@ -13,7 +13,7 @@ import logging
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
-from sqlalchemy import create_engine, and_, or_, desc
+from sqlalchemy import create_engine, and_, or_, desc, func, update
 from sqlalchemy.orm import sessionmaker
 from sqlmodel import SQLModel, select, Session
 
@@ -121,6 +121,32 @@ class SMSRequestRepository:
             logger.info(f"Created SMS request {sms_request.id} for phone {phone}")
             return sms_request
 
+    def create_requests(self, messages: List[Dict[str, str]], status: str = "pending") -> List[SMSRequest]:
+        """Create SMS requests for a batch of phone/text messages in one transaction."""
+        from sqlmodel import Session as _Session
+
+        # Keep the committed rows readable after the session closes
+        with _Session(self.engine, expire_on_commit=False) as session:
+            sms_requests = [
+                SMSRequest(
+                    phone=message["phone"],
+                    text=message["text"],
+                    status=status,
+                    provider_used=None,
+                    retry_count=0,
+                    max_retries=5,
+                    failed_providers="",
+                    is_permanently_failed=False
+                )
+                for message in messages
+            ]
+
+            session.add_all(sms_requests)
+            session.commit()
+
+            logger.info(f"Created {len(sms_requests)} SMS requests in one batch")
+            return sms_requests
+
     def update_request_status(self, request_id: int, status: str, provider_used: Optional[str] = None) -> bool:
         """Update SMS request status and provider using the repository's engine."""
         from sqlmodel import Session as _Session
@@ -138,6 +164,24 @@ class SMSRequestRepository:
             logger.info(f"Updated SMS request {request_id} status to {status}")
             return True
 
+    def update_requests_status(self, request_ids: List[int], status: str) -> int:
+        """Set the status of several SMS requests in one UPDATE and commit it."""
+        from sqlmodel import Session as _Session
+
+        if not request_ids:
+            return 0
+
+        with _Session(self.engine) as session:
+            result = session.execute(
+                update(SMSRequest)
+                .where(SMSRequest.id.in_(request_ids))
+                .values(status=status, updated_at=datetime.utcnow())
+            )
+            session.commit()
+
+            logger.info(f"Updated {result.rowcount} SMS requests status to {status}")
+            return result.rowcount
+
     def update_request_retry_info(self, request_id: int, retry_count: int,
                                  failed_providers: str, is_permanently_failed: bool = False) -> bool:
         """Update SMS request retry information using the repository's engine."""
@@ -164,6 +208,15 @@ class SMSRequestRepository:
         with _Session(self.engine) as session:
             return session.get(SMSRequest, request_id)
 
+    def get_requests_by_ids(self, request_ids: List[int]) -> List[SMSRequest]:
+        """Get several SMS requests by ID with a single primary-key IN query."""
+        from sqlmodel import Session as _Session
+
+        if not request_ids:
+            return []
+        with _Session(self.engine) as session:
+            return session.exec(select(SMSRequest).where(SMSRequest.id.in_(request_ids))).all()
+
     def get_requests_by_status(self, status: str, limit: int = 100) -> List[SMSRequest]:
         """Get SMS requests by status using the repository's engine."""
         from sqlmodel import Session as _Session
@@ -190,6 +243,19 @@ class SMSRequestRepository:
                 ).limit(limit)
             ).all()
 
+    def get_request_by_phone_text(self, phone: str, text: str) -> Optional[SMSRequest]:
+        """Get the most recent SMS request for a phone number and message text."""
+        from sqlmodel import Session as _Session
+
+        with _Session(self.engine) as session:
+            # The phone index narrows the scan; only the newest match is loaded
+            return session.exec(
+                select(SMSRequest)
+                .where(SMSRequest.phone == phone, SMSRequest.text == text)
+                .order_by(desc(SMSRequest.created_at), desc(SMSRequest.id))
+                .limit(1)
+            ).first()
+
     def get_requests_with_filters(self, status: Optional[str] = None,
                                  provider: Optional[str] = None,
                                  start_time: Optional[datetime] = None,
@@ -212,33 +278,52 @@ class SMSRequestRepository:
  
             return session.exec(query.limit(limit)).all()
 
+    def count(self, status: Optional[str] = None, provider: Optional[str] = None,
+              start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> int:
+        """Count SMS requests matching the filters with SELECT COUNT(*), without loading rows."""
+        from sqlmodel import Session as _Session
+
+        with _Session(self.engine) as session:
+            query = select(func.count()).select_from(SMSRequest)
+
+            if status:
+                query = query.where(SMSRequest.status == status)
+            if provider:
+                query = query.where(SMSRequest.provider_used == provider)
+            if start_time:
+                query = query.where(SMSRequest.created_at >= start_time)
+            if end_time:
+                query = query.where(SMSRequest.created_at <= end_time)
+
+            return session.exec(query).one()
+
     def get_request_stats(self) -> Dict[str, Any]:
         """Get SMS request statistics using the repository's engine."""
         from sqlmodel import Session as _Session
  
         with _Session(self.engine) as session:
-            total_requests = session.exec(select(SMSRequest)).all()
- 
-            stats = {
-                "total_requests": len(total_requests),
-                "status_breakdown": {},
-                "provider_breakdown": {},
-                "recent_requests": len(self.get_requests_by_time_range(
-                    datetime.utcnow() - timedelta(hours=1), datetime.utcnow()
-                ))
-            }
- 
-            # Count by status
-            for status in ["pending", "processing", "completed", "failed"]:
-                count = len([r for r in total_requests if r.status == status])
-                stats["status_breakdown"][status] = count
- 
-            # Count by provider
-            for provider in ["provider1", "provider2", "provider3"]:
-                count = len([r for r in total_requests if r.provider_used == provider])
-                stats["provider_breakdown"][provider] = count
- 
-            return stats
+            # Let the database aggregate instead of loading every request row
+            status_counts = dict(session.exec(
+                select(SMSRequest.status, func.count()).group_by(SMSRequest.status)
+            ).all())
+            provider_counts = dict(session.exec(
+                select(SMSRequest.provider_used, func.count()).group_by(SMSRequest.provider_used)
+            ).all())
+
+        return {
+            "total_requests": sum(status_counts.values()),
+            "status_breakdown": {
+                status: status_counts.get(status, 0)
+                for status in ["pending", "processing", "completed", "failed"]
+            },
+            "provider_breakdown": {
+                provider: provider_counts.get(provider, 0)
+                for provider in ["provider1", "provider2", "provider3"]
+            },
+            "recent_requests": self.count(
+                start_time=datetime.utcnow() - timedelta(hours=1), end_time=datetime.utcnow()
+            )
+        }
 
 
 class SMSResponseRepository:
@@ -278,6 +363,29 @@ class SMSResponseRepository:
         with _Session(self.engine) as session:
             return session.exec(select(SMSResponse).where(SMSResponse.request_id == request_id)).first()
 
+    def get_responses_by_request_id(self, request_id: int) -> List[SMSResponse]:
+        """Get every SMS response for a request, oldest first, via the request_id index."""
+        from sqlmodel import Session as _Session
+
+        with _Session(self.engine) as session:
+            return session.exec(
+                select(SMSResponse).where(SMSResponse.request_id == request_id).order_by(SMSResponse.created_at)
+            ).all()
+
+    def count(self, start_time: Optional[datetime] = None, end_time: Optional[datetime] = None) -> int:
+        """Count SMS responses in the optional time range with SELECT COUNT(*), without loading rows."""
+        from sqlmodel import Session as _Session
+
+        with _Session(self.engine) as session:
+            query = select(func.count()).select_from(SMSResponse)
+
+            if start_time:
+                query = query.where(SMSResponse.created_at >= start_time)
+            if end_time:
+                query = query.where(SMSResponse.created_at <= end_time)
+
+            return session.exec(query).one()
+
     def get_responses_by_time_range(self, start_time: datetime, end_time: datetime,
                                    limit: int = 100) -> List[SMSResponse]:
         """Get SMS responses within time range."""
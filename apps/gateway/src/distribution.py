@@ -7,6 +7,7 @@ when providers are healthy and fallback logic when providers become unhealthy.
 
 import asyncio
 import logging
+import time
 from collections import defaultdict, deque
 from dataclasses import dataclass, field
 from typing import Any, Dict, List, Optional, Tuple
@@ -18,7 +19,7 @@ from .rate_limiter import GlobalRateLimiter, RateLimiter
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class ProviderStatus:
     """Status information for a provider."""
     provider_id: str
@@ -28,7 +29,7 @@ class ProviderStatus:
     last_used: float = 0.0
 
 
-@dataclass
+@dataclass(slots=True)
 class DistributionStats:
     """Statistics for distribution tracking."""
     total_requests: int = 0
@@ -50,6 +51,13 @@ class SMSDistributionService:
     - Graceful handling of single healthy provider scenarios
     """
 
+    # Maximum number of concurrent health probes during a status refresh
+    MAX_CONCURRENT_PROBES = 16
+
+    # Consecutive rate limiter failures that open the circuit, and how long it stays open
+    RATE_LIMITER_FAILURE_THRESHOLD = 5
+    RATE_LIMITER_COOLDOWN_SECONDS = 1.0
+
     def __init__(
         self,
         health_tracker: ProviderHealthTracker,
@@ -71,9 +79,23 @@ class SMSDistributionService:
         self.global_rate_limiter = global_rate_limiter
         self.provider_urls = provider_urls
 
+        # Provider IDs in configuration order, iterated on every status refresh
+        self._provider_ids: Tuple[str, ...] = tuple(provider_urls)
+
+        # Zeroed per-provider request counts, copied whenever stats are (re)initialized
+        self._zero_request_counts: Dict[str, int] = dict.fromkeys(self._provider_ids, 0)
+
+        # Prebuilt (provider_id, provider_url) results returned by select_provider
+        self._selection_results: Dict[str, Tuple[str, str]] = {
+            provider_id: (provider_id, provider_url)
+            for provider_id, provider_url in provider_urls.items()
+        }
+
         # Provider status tracking
         self.provider_status: Dict[str, ProviderStatus] = {}
-        self.distribution_stats = DistributionStats()
+        self.distribution_stats = DistributionStats(
+            requests_per_provider=dict(self._zero_request_counts)
+        )
 
         # Round-robin state for healthy providers
         self.healthy_providers_queue: deque = deque()
@@ -83,22 +105,38 @@ class SMSDistributionService:
         self.health_check_interval = 30.0
         self.last_health_update = 0.0
 
+        # Bound in-flight health probes so large provider sets do not flood Redis
+        self._probe_semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_PROBES)
+
+        # Circuit breaker state for rate limiter failures
+        self._rate_limiter_failures = 0
+        self._rate_limiter_circuit_open_until = 0.0
+
         # Initialize provider statuses
         self._initialize_providers()
 
     def _initialize_providers(self):
         """Initialize provider status tracking."""
-        for provider_id in self.provider_urls.keys():
+        for provider_id in self._provider_ids:
             self.provider_status[provider_id] = ProviderStatus(
                 provider_id=provider_id,
                 is_healthy=True,  # Default to healthy
                 is_rate_limited=False
             )
-            self.distribution_stats.requests_per_provider[provider_id] = 0
 
-    async def _update_provider_health_status(self) -> None:
-        """Update health status for all providers."""
-        current_time = asyncio.get_event_loop().time()
+    async def _probe_provider_health(self, provider_id: str) -> Dict[str, Any]:
+        """Fetch health status for one provider while holding a probe slot."""
+        async with self._probe_semaphore:
+            return await self.health_tracker.get_health_status(provider_id)
+
+    async def _update_provider_health_status(self, now: Optional[float] = None) -> None:
+        """
+        Update health status for all providers.
+
+        Args:
+            now: Monotonic timestamp snapshot taken by the caller (read if omitted)
+        """
+        current_time = time.monotonic() if now is None else now
 
         # Only update if enough time has passed
         if current_time - self.last_health_update < self.health_check_interval:
@@ -106,8 +144,12 @@ class SMSDistributionService:
 
         self.last_health_update = current_time
 
-        for provider_id in self.provider_urls.keys():
-            health_info = await self.health_tracker.get_health_status(provider_id)
+        # Probe providers concurrently, bounded by the probe semaphore
+        health_infos = await asyncio.gather(
+            *(self._probe_provider_health(provider_id) for provider_id in self._provider_ids)
+        )
+
+        for provider_id, health_info in zip(self._provider_ids, health_infos):
             is_healthy = health_info.get("is_healthy", True)
 
             self.provider_status[provider_id].is_healthy = is_healthy
@@ -117,26 +159,59 @@ class SMSDistributionService:
             else:
                 logger.warning(f"Provider {provider_id} is unhealthy (failure rate: {health_info.get('failure_rate', 0):.3f})")
 
-        # Update healthy/unhealthy provider counts in distribution_stats
-        healthy_count = sum(
-            1 for status in self.provider_status.values() if status.is_healthy
-        )
-        unhealthy_count = sum(
-            1 for status in self.provider_status.values() if not status.is_healthy
-        )
-        self.distribution_stats.healthy_providers = healthy_count
-        self.distribution_stats.unhealthy_providers = unhealthy_count
+        # Update healthy/unhealthy provider counts in distribution_stats (single pass)
+        healthy_count = sum(status.is_healthy for status in self.provider_status.values())
+        stats = self.distribution_stats
+        stats.healthy_providers = healthy_count
+        stats.unhealthy_providers = len(self.provider_status) - healthy_count
 
     async def _update_provider_rate_limit_status(self) -> None:
         """Update rate limit status for all providers."""
-        for provider_id in self.provider_urls.keys():
-            allowed, count = await self.rate_limiter.is_allowed(provider_id)
+        for provider_id in self._provider_ids:
+            # Redis errors are raised instead of allowed so the circuit breaker sees them
+            allowed, count = await self.rate_limiter.is_allowed(provider_id, fail_open=False)
             self.provider_status[provider_id].is_rate_limited = not allowed
             self.provider_status[provider_id].current_load = count
 
             if not allowed:
                 logger.debug(f"Provider {provider_id} is rate limited (count: {count})")
 
+    async def _refresh_rate_limit_status(self, now: float) -> bool:
+        """
+        Refresh rate limit status unless the rate limiter circuit is open.
+
+        After RATE_LIMITER_FAILURE_THRESHOLD consecutive failures the circuit opens
+        for RATE_LIMITER_COOLDOWN_SECONDS, during which selections are rejected
+        locally instead of hitting a struggling rate limiter backend. The first
+        selection after the cooldown probes the limiter: a failure reopens the
+        circuit straight away, a success closes it.
+
+        Args:
+            now: Monotonic timestamp snapshot taken by the caller
+
+        Returns:
+            False if the circuit is open, True once status has been refreshed
+        """
+        if now < self._rate_limiter_circuit_open_until:
+            logger.warning("Rate limiter circuit open, rejecting selection")
+            return False
+
+        try:
+            await self._update_provider_rate_limit_status()
+        except Exception:
+            self._rate_limiter_failures += 1
+            # The count is kept while open, so a failed probe after the cooldown reopens it
+            if self._rate_limiter_failures >= self.RATE_LIMITER_FAILURE_THRESHOLD:
+                self._rate_limiter_circuit_open_until = now + self.RATE_LIMITER_COOLDOWN_SECONDS
+                logger.error(
+                    f"Rate limiter failed {self._rate_limiter_failures} times in a row, "
+                    f"opening circuit for {self.RATE_LIMITER_COOLDOWN_SECONDS}s"
+                )
+            raise
+
+        self._rate_limiter_failures = 0
+        return True
+
     def _get_healthy_providers(self) -> List[str]:
         """Get list of currently healthy providers."""
         healthy_providers = []
@@ -173,12 +248,13 @@ class SMSDistributionService:
             return None
 
         # Get provider using round-robin
-        provider_id = self.healthy_providers_queue[self.distribution_stats.round_robin_index]
+        stats = self.distribution_stats
+        index = stats.round_robin_index
+        provider_id = self.healthy_providers_queue[index]
 
-        # Update index for next round-robin selection
-        self.distribution_stats.round_robin_index = (
-            self.distribution_stats.round_robin_index + 1
-        ) % len(self.healthy_providers_queue)
+        # Advance with a compare-and-wrap rather than a modulo
+        index += 1
+        stats.round_robin_index = 0 if index >= len(self.healthy_providers_queue) else index
 
         return provider_id
 
@@ -188,7 +264,7 @@ class SMSDistributionService:
 
         Returns True if any provider has failures, False otherwise.
         """
-        for provider_id in self.provider_urls.keys():
+        for provider_id in self._provider_ids:
             health_info = await self.health_tracker.get_health_status(provider_id)
             failure_count = health_info.get("failure_count", 0)
             failure_rate = health_info.get("failure_rate", 0)
@@ -206,9 +282,21 @@ class SMSDistributionService:
         if not healthy_providers:
             return None
 
-        # Calculate weights based on success rates
+        weights = await self._get_provider_weights(healthy_providers)
+        return self._pick_weighted_provider(healthy_providers, weights)
+
+    async def _get_provider_weights(self, providers: List[str]) -> Dict[str, float]:
+        """
+        Weight providers by success rate, reading each provider's health once.
+
+        Args:
+            providers: Provider IDs to weigh
+
+        Returns:
+            Dictionary mapping provider ID to its weight (at least 0.1)
+        """
         weights = {}
-        for provider_id in healthy_providers:
+        for provider_id in providers:
             health_info = await self.health_tracker.get_health_status(provider_id)
             # Calculate success rate from failure rate or use provided success rate
             if "success_rate" in health_info:
@@ -219,13 +307,25 @@ class SMSDistributionService:
                 success_rate = 1.0  # Default if no rate information
             # Use success rate as weight (higher success = higher weight)
             weights[provider_id] = max(0.1, success_rate)  # Minimum weight of 0.1
+        return weights
+
+    def _pick_weighted_provider(self, providers: List[str], weights: Dict[str, float]) -> Optional[str]:
+        """
+        Pick the provider with the best weight-to-usage score.
+
+        Args:
+            providers: Candidate provider IDs
+            weights: Weight per provider from _get_provider_weights
 
+        Returns:
+            Selected provider ID or None
+        """
         # Select provider balancing between weight and usage count
         # Calculate a score that favors higher weights while still considering fairness
         best_provider = None
         best_score = -1
 
-        for provider_id in healthy_providers:
+        for provider_id in providers:
             weight = weights[provider_id]
             usage = self.provider_usage_count.get(provider_id, 0)
             # Give more emphasis to weight vs fairness
@@ -251,12 +351,11 @@ class SMSDistributionService:
             return None
 
         # Use round-robin index to select provider
-        provider_id = providers[
-            self.distribution_stats.round_robin_index % len(providers)
-        ]
+        stats = self.distribution_stats
+        provider_id = providers[stats.round_robin_index % len(providers)]
 
         # Update index for next selection
-        self.distribution_stats.round_robin_index += 1
+        stats.round_robin_index += 1
 
         return provider_id
 
@@ -304,18 +403,16 @@ class SMSDistributionService:
         Returns:
             Tuple of (provider_id, provider_url) or None if no provider available
         """
+        # Single monotonic snapshot shared by the health refresh and circuit breaker checks
+        now = time.monotonic()
+
         try:
             # Update distribution statistics
             self.distribution_stats.total_requests += 1
 
             # Update provider health and rate limit status
-            await self._update_provider_health_status()
-            await self._update_provider_rate_limit_status()
-
-            # Check global rate limit first (non-mutating check)
-            global_count = await self.global_rate_limiter.get_current_count()
-            if global_count >= self.global_rate_limiter.rate_limit:
-                logger.warning(f"Global rate limit exceeded: {global_count}")
+            await self._update_provider_health_status(now)
+            if not await self._refresh_rate_limit_status(now):
                 return None
 
             # Get all healthy and non-rate-limited providers
@@ -327,6 +424,9 @@ class SMSDistributionService:
             # Check if we should use weighted distribution based on failure history
             use_weighted_distribution = await self._should_use_weighted_distribution()
 
+            # Restored if the limit re-check denies the pick, so denied requests don't skew rotation
+            round_robin_index = self.distribution_stats.round_robin_index
+
             if use_weighted_distribution:
                 # Use weighted round-robin based on success rates
                 selected_provider = await self._get_weighted_provider_round_robin()
@@ -360,16 +460,28 @@ class SMSDistributionService:
                         )
                         return None
 
+                # Re-check the global limit and the selected provider's limit in one round-trip
+                allowed, global_count = await self.rate_limiter.check_with_global(
+                    selected_provider, self.global_rate_limiter
+                )
+                if not allowed:
+                    logger.warning(
+                        f"Global or provider rate limit exceeded for {selected_provider} (global count: {global_count})"
+                    )
+                    self.distribution_stats.round_robin_index = round_robin_index
+                    return None
+
                 # Update usage statistics
+                # last_used is reported as a wall-clock timestamp
+                self.provider_status[selected_provider].last_used = time.time()
                 self.provider_usage_count[selected_provider] += 1
                 self.distribution_stats.requests_per_provider[selected_provider] += 1
 
-                provider_url = self.provider_urls[selected_provider]
                 logger.info(
                     f"Selected provider {selected_provider} via {distribution_type} (usage count: {self.provider_usage_count[selected_provider]})"
                 )
 
-                return selected_provider, provider_url
+                return self._selection_results[selected_provider]
             else:
                 logger.warning("No provider selected")
                 return None
@@ -394,6 +506,96 @@ class SMSDistributionService:
                 # For rate limiter errors and other unexpected errors, return None
                 return None
 
+    async def select_providers_batch(self, count: int) -> List[Tuple[str, str]]:
+        """
+        Select providers for several requests with a single status refresh.
+
+        Health and rate limit status are refreshed once for the whole batch. Slots
+        for the picks are then reserved against each provider's limit and the global
+        limit in one round-trip each, and picks beyond the granted slots are dropped.
+
+        Args:
+            count: Number of requests to select providers for
+
+        Returns:
+            List of (provider_id, provider_url) tuples; shorter than count (or empty)
+            when limits or provider health prevent serving the whole batch
+        """
+        if count <= 0:
+            return []
+
+        now = time.monotonic()
+
+        try:
+            self.distribution_stats.total_requests += count
+
+            await self._update_provider_health_status(now)
+            if not await self._refresh_rate_limit_status(now):
+                return []
+
+            healthy_providers = self._get_healthy_providers()
+            if not healthy_providers:
+                logger.warning("No healthy providers available for batch selection")
+                return []
+
+            if await self._should_use_weighted_distribution():
+                # Weights only depend on health, so read it once for the whole batch
+                weights = await self._get_provider_weights(healthy_providers)
+                selected_providers = []
+                for _ in range(count):
+                    provider_id = self._pick_weighted_provider(healthy_providers, weights)
+                    # Weighted scoring depends on usage, so account for each pick
+                    self.provider_usage_count[provider_id] += 1
+                    selected_providers.append(provider_id)
+                # Usage is re-counted below for the picks that get a reserved slot
+                for provider_id in selected_providers:
+                    self.provider_usage_count[provider_id] -= 1
+            else:
+                # Take `count` consecutive round-robin entries and advance the index once
+                stats = self.distribution_stats
+                start = stats.round_robin_index
+                provider_count = len(healthy_providers)
+                selected_providers = [
+                    healthy_providers[(start + offset) % provider_count]
+                    for offset in range(count)
+                ]
+                stats.round_robin_index += count
+
+            # Reserve provider slots for the picks, then global slots for what the providers granted
+            requested: Dict[str, int] = defaultdict(int)
+            for provider_id in selected_providers:
+                requested[provider_id] += 1
+            remaining = await self.rate_limiter.reserve_batch(requested)
+            global_granted, global_count = await self.global_rate_limiter.is_allowed_batch(
+                sum(remaining.values())
+            )
+            if global_granted < len(selected_providers):
+                logger.warning(
+                    f"Rate limits granted {global_granted} of {len(selected_providers)} batch picks "
+                    f"(global count: {global_count})"
+                )
+
+            # last_used is reported as a wall-clock timestamp
+            used_at = time.time()
+            selections = []
+            for provider_id in selected_providers:
+                if len(selections) >= global_granted:
+                    break
+                if not remaining.get(provider_id):
+                    continue
+                remaining[provider_id] -= 1
+                self.provider_usage_count[provider_id] += 1
+                self.distribution_stats.requests_per_provider[provider_id] += 1
+                self.provider_status[provider_id].last_used = used_at
+                selections.append(self._selection_results[provider_id])
+
+            logger.info(f"Selected {len(selections)} of {count} providers in batch")
+            return selections
+
+        except Exception as e:
+            logger.error(f"Error selecting provider batch: {str(e)}")
+            return []
+
     def get_distribution_stats(self) -> Dict[str, Any]:
         """Get current distribution statistics."""
         return {
@@ -419,16 +621,27 @@ class SMSDistributionService:
 
     async def reset_stats(self) -> None:
         """Reset all distribution statistics."""
-        self.distribution_stats.total_requests = 0
-        self.distribution_stats.healthy_providers = 0
-        self.distribution_stats.unhealthy_providers = 0
-        # Reset requests_per_provider to 0 for all providers instead of clearing
-        for provider_id in self.provider_urls.keys():
-            self.distribution_stats.requests_per_provider[provider_id] = 0
-        self.distribution_stats.round_robin_index = 0
+        # Replace the stats in one construction; requests_per_provider keeps a
+        # zero entry for every provider instead of being cleared
+        self.distribution_stats = DistributionStats(
+            requests_per_provider=dict(self._zero_request_counts)
+        )
         self.provider_usage_count.clear()
         self.healthy_providers_queue.clear()
 
+    async def reset_state(self) -> None:
+        """
+        Return the service to a freshly constructed state.
+
+        Resets distribution statistics, provider statuses, the health refresh
+        timestamp and the rate limiter circuit breaker.
+        """
+        await self.reset_stats()
+        self._initialize_providers()
+        self.last_health_update = 0.0
+        self._rate_limiter_failures = 0
+        self._rate_limiter_circuit_open_until = 0.0
+
 
 def create_distribution_service(
     health_tracker: ProviderHealthTracker,
@@ -5,28 +5,65 @@ This module implements a health monitoring system that tracks provider success/f
 over 5-minute sliding windows and marks providers as unhealthy when failure rate exceeds 70%.
 """
 
+import asyncio
 import time
 import logging
-from typing import Dict, Any, Optional, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 from collections import defaultdict
 
-from redis.asyncio import Redis
-from redis.exceptions import ConnectionError, TimeoutError, RedisError
+from redis.asyncio import ConnectionPool, Redis
 
 from .utils import parse_redis_int
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
+# Process-wide connection pool shared by health trackers built without an explicit client
+_connection_pool: Optional[ConnectionPool] = None
+
+
+def get_connection_pool() -> ConnectionPool:
+    """
+    Get or create the process-wide Redis connection pool.
+
+    The pool size is controlled by `settings.redis_max_connections`; size it to the
+    number of concurrent health reads/writes expected per worker process.
+
+    Returns:
+        Shared ConnectionPool instance
+    """
+    global _connection_pool
+    if _connection_pool is None:
+        from .config import settings
+
+        # Keep raw bytes responses; parse_redis_int parses them without decoding
+        _connection_pool = ConnectionPool.from_url(
+            settings.redis_url,
+            max_connections=settings.redis_max_connections,
+            decode_responses=False
+        )
+    return _connection_pool
+
 
 class ProviderHealthTracker:
     """
     Redis-based health tracking for SMS providers with sliding window calculations.
 
     Tracks success and failure counts over 5-minute windows and marks providers as unhealthy
-    when failure rate exceeds 70%. Uses Redis keys that expire automatically after 5 minutes.
+    when failure rate exceeds 70%. Each provider has one Redis hash holding `s:{window}` and
+    `f:{window}` counter fields; windows that slide out are pruned and the hash expires once the
+    provider goes quiet. Recorded outcomes are written through before record_success/record_failure
+    return; outcomes recorded while a flush is in flight are aggregated into the next one.
     """
 
+    # Providers reported by get_all_providers_health; static, so no Redis key enumeration is needed
+    PROVIDER_IDS = ("provider1", "provider2", "provider3")
+    # Hash field prefixes for success and failure window counters
+    FIELD_PREFIXES = {"success": "s:", "failure": "f:"}
+
+    # Seconds an is_provider_healthy result is reused before re-reading Redis
+    HEALTHY_CACHE_TTL_SECONDS = 1.0
+
     def __init__(
         self,
         redis_client: Redis,
@@ -48,48 +85,136 @@ class ProviderHealthTracker:
         # recent increments (some test fixtures mock redis.incr but keep redis.get static).
         # This keeps health calculations accurate during in-process integration tests.
         self._local_counters = defaultdict(lambda: {"success": 0, "failure": 0})
+        # Counter deltas keyed by (provider key, window field), waiting to be flushed with HINCRBY
+        self._pending: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._flush_lock = asyncio.Lock()
+        # Per-provider "health:{provider_id}" hash keys, built once per provider
+        self._provider_keys: Dict[str, str] = {}
+        # provider_id -> (expires_at, is_healthy) for is_provider_healthy
+        self._healthy_cache: Dict[str, Tuple[float, bool]] = {}
+        # provider_id -> in-flight get_health_status fetch shared by concurrent callers
+        self._inflight: Dict[str, asyncio.Task] = {}
+        # Template copied for the status reported when metrics cannot be read
+        self._error_status_template: Dict[str, Any] = {
+            "provider_id": None,
+            "error": None,
+            "is_healthy": True,  # Default to healthy on error
+            "total_requests": 0,
+            "success_count": 0,
+            "failure_count": 0,
+            "failure_rate": 0.0,
+            "timestamp": None
+        }
+        # Power-of-two windows start at a bitmask of the timestamp instead of a division
+        if window_duration > 0 and window_duration & (window_duration - 1) == 0:
+            self._window_mask = ~(window_duration - 1)
+            self._window_start = self._masked_window_start
+        else:
+            self._window_start = self._divided_window_start
+
+    def _divided_window_start(self, now: float) -> int:
+        """
+        Get the start of the window containing a timestamp.
+
+        Args:
+            now: Current time in seconds
+
+        Returns:
+            Window start in whole seconds
+        """
+        return int(now // self.window_duration) * self.window_duration
+
+    def _masked_window_start(self, now: float) -> int:
+        """
+        Get the start of the window containing a timestamp for power-of-two window durations.
+
+        Args:
+            now: Current time in seconds
+
+        Returns:
+            Window start in whole seconds
+        """
+        return int(now) & self._window_mask
 
-    def _get_window_key(self, provider_id: str, metric_type: str) -> str:
+    def _get_provider_key(self, provider_id: str) -> str:
         """
-        Generate Redis key for provider health metrics.
+        Get the cached Redis key of the hash holding a provider's window counters.
 
         Args:
             provider_id: Provider identifier (provider1, provider2, provider3)
+
+        Returns:
+            Redis key of the form "health:{provider_id}"
+        """
+        provider_key = self._provider_keys.get(provider_id)
+        if provider_key is None:
+            provider_key = self._provider_keys[provider_id] = f"health:{provider_id}"
+        return provider_key
+
+    def _get_window_field(self, metric_type: str, now: Optional[float] = None) -> str:
+        """
+        Generate the hash field holding a metric for the current window.
+
+        Args:
             metric_type: Either 'success' or 'failure'
+            now: Current time in seconds (defaults to time.time())
 
         Returns:
-            Redis key for the metric
+            Hash field of the form "s:{window}" or "f:{window}"
         """
-        current_window = int(time.time() // self.window_duration) * self.window_duration
-        return f"health:{provider_id}:{metric_type}:{current_window}"
+        if now is None:
+            now = time.time()
+        current_window = self._window_start(now)
+        return f"{self.FIELD_PREFIXES[metric_type]}{current_window}"
 
-    def _get_current_window_keys(self, provider_id: str) -> Tuple[str, str, str, str]:
+    def _get_current_window_fields(self, now: Optional[float] = None) -> Tuple[str, str, str, str]:
         """
-        Get current and previous window keys for sliding window calculation.
+        Get current and previous window fields for sliding window calculation.
 
         Args:
-            provider_id: Provider identifier
+            now: Current time in seconds (defaults to time.time())
 
         Returns:
-            Tuple of (current_success_key, current_failure_key, prev_success_key, prev_failure_key)
+            Tuple of (current_success_field, current_failure_field, prev_success_field, prev_failure_field)
         """
-        now = time.time()
-        current_window = int(now // self.window_duration) * self.window_duration
+        if now is None:
+            now = time.time()
+        current_window = self._window_start(now)
         previous_window = current_window - self.window_duration
 
-        current_success_key = f"health:{provider_id}:success:{current_window}"
-        current_failure_key = f"health:{provider_id}:failure:{current_window}"
-        prev_success_key = f"health:{provider_id}:success:{previous_window}"
-        prev_failure_key = f"health:{provider_id}:failure:{previous_window}"
+        success_prefix = self.FIELD_PREFIXES["success"]
+        failure_prefix = self.FIELD_PREFIXES["failure"]
+
+        return (
+            f"{success_prefix}{current_window}",
+            f"{failure_prefix}{current_window}",
+            f"{success_prefix}{previous_window}",
+            f"{failure_prefix}{previous_window}",
+        )
 
-        return current_success_key, current_failure_key, prev_success_key, prev_failure_key
+    def _previous_window_weight(self, now: float) -> float:
+        """
+        Get the fraction of the previous window that still falls into the sliding window.
+
+        Args:
+            now: Current time in seconds
+
+        Returns:
+            Weight between 0.0 and 1.0 applied to previous-window counts
+        """
+        current_window_start = self._window_start(now)
+        fraction_into_window = (now - current_window_start) / float(self.window_duration)
+
+        # Weight from previous window (how much is still valid)
+        return max(0.0, 1.0 - fraction_into_window)
 
     def _calculate_sliding_window_metrics(
         self,
         current_success: int,
         current_failure: int,
         prev_success: int,
-        prev_failure: int
+        prev_failure: int,
+        now: Optional[float] = None
     ) -> Tuple[int, int, float]:
         """
         Calculate sliding window metrics with time weighting.
@@ -99,21 +224,22 @@ class ProviderHealthTracker:
         are truncated to integers (floor) to match test expectations and avoid
         fractional request counts.
 
+        The two-bucket approximation already answers a window query from four
+        fixed counters, so reads stay constant-time regardless of traffic.
+
         Args:
             current_success: Success count in current window
             current_failure: Failure count in current window
             prev_success: Success count in previous window
             prev_failure: Failure count in previous window
+            now: Current time in seconds (defaults to time.time())
 
         Returns:
             Tuple of (total_success, total_failure, failure_rate)
         """
-        now = time.time()
-        current_window_start = int(now // self.window_duration) * self.window_duration
-        fraction_into_window = (now - current_window_start) / float(self.window_duration)
-
-        # Weight from previous window (how much is still valid)
-        previous_weight = max(0.0, 1.0 - fraction_into_window)
+        if now is None:
+            now = time.time()
+        previous_weight = self._previous_window_weight(now)
 
         # Truncate weighted previous counts to integers to represent whole requests
         weighted_prev_success = int(prev_success * previous_weight)
@@ -130,49 +256,134 @@ class ProviderHealthTracker:
 
         return total_success, total_failure, failure_rate
 
-    async def record_success(self, provider_id: str) -> bool:
+    def _calculate_sliding_window_metrics_batch(
+        self,
+        current_success: List[int],
+        current_failure: List[int],
+        prev_success: List[int],
+        prev_failure: List[int],
+        now: Optional[float] = None
+    ) -> Tuple[List[int], List[int], List[float]]:
         """
-        Record a successful SMS send for a provider.
+        Calculate sliding window metrics for several providers at once.
+
+        Same math as _calculate_sliding_window_metrics, but the previous-window
+        weight is computed once and applied to every provider.
 
         Args:
-            provider_id: Provider identifier
+            current_success: Success counts in current window, one per provider
+            current_failure: Failure counts in current window, one per provider
+            prev_success: Success counts in previous window, one per provider
+            prev_failure: Failure counts in previous window, one per provider
+            now: Current time in seconds (defaults to time.time())
 
         Returns:
-            True if recorded successfully
+            Tuple of (total_success, total_failure, failure_rate) lists
         """
-        try:
-            current_success_key, _, _, _ = self._get_current_window_keys(provider_id)
+        if now is None:
+            now = time.time()
+        previous_weight = self._previous_window_weight(now)
+
+        total_success = [
+            int(success) + int(prev * previous_weight)
+            for success, prev in zip(current_success, prev_success)
+        ]
+        total_failure = [
+            int(failure) + int(prev * previous_weight)
+            for failure, prev in zip(current_failure, prev_failure)
+        ]
+        failure_rate = [
+            failure / (success + failure) if success + failure else 0.0
+            for success, failure in zip(total_success, total_failure)
+        ]
+
+        return total_success, total_failure, failure_rate
+
+    async def flush_now(self) -> bool:
+        """
+        Flush pending success/failure deltas to Redis in a single MULTI/EXEC round-trip.
+
+        The increments and expiries are applied atomically, so a failed flush leaves
+        nothing half-written and its deltas can be retried without double counting.
+
+        Returns:
+            True if all pending deltas were written (or none were pending)
+        """
+        async with self._flush_lock:
+            if not self._pending:
+                return True
+
+            pending = self._pending
+            self._pending = defaultdict(int)
 
-            # Atomically increment success counter
             try:
-                await self.redis.incr(current_success_key)
-                # Set expiry for the key (5 minutes from now)
-                await self.redis.expire(current_success_key, self.window_duration)
-            except (ConnectionError, TimeoutError, RedisError) as e:
-                # Critical Redis errors should be surfaced to caller so tests can assert failures.
-                logger.error(f"Redis error recording success for {provider_id}: {str(e)}")
+                # Fields of the two windows before the previous one have left the sliding window
+                current_window = self._window_start(time.time())
+                stale_fields = [
+                    f"{field_prefix}{window}"
+                    for window in (
+                        current_window - 2 * self.window_duration,
+                        current_window - 3 * self.window_duration
+                    )
+                    for field_prefix in self.FIELD_PREFIXES.values()
+                ]
+
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    for (key, field), delta in pending.items():
+                        pipe.hincrby(key, field, delta)
+                    for key in {key for key, _ in pending}:
+                        pipe.hdel(key, *stale_fields)
+                        # Keep the hash for the current and previous windows
+                        pipe.expire(key, 2 * self.window_duration)
+                    await pipe.execute()
+                return True
+            except Exception as e:
+                logger.error(f"Error flushing health counters: {str(e)}")
+                # Keep the deltas so they are retried on the next flush
+                for key, delta in pending.items():
+                    self._pending[key] += delta
                 return False
-            except Exception:
-                # In some mock environments, non-Redis exceptions can be ignored and we fallback
-                # to local in-memory counters to keep tests stable.
-                pass
- 
-            # Update local in-memory counters for test fallbacks
-            try:
-                self._local_counters[provider_id]["success"] += 1
-            except Exception:
-                # defensive: ignore if local counters unavailable
-                pass
- 
-            logger.debug(f"Recorded success for provider {provider_id}")
-            return True
 
-        except (ConnectionError, TimeoutError) as e:
-            logger.error(f"Redis connection error recording success for {provider_id}: {str(e)}")
-            return False
-        except RedisError as e:
-            logger.error(f"Redis error recording success for {provider_id}: {str(e)}")
+    async def _record_outcome(self, provider_id: str, metric_type: str) -> bool:
+        """
+        Buffer a success/failure outcome and flush it to Redis before returning.
+
+        Trackers are short-lived (one per request or task), so nothing may be left
+        buffered once the caller moves on. Concurrent callers waiting on the flush
+        lock find their deltas already written by the flush in flight.
+
+        Args:
+            provider_id: Provider identifier
+            metric_type: Either 'success' or 'failure'
+
+        Returns:
+            True if recorded successfully
+        """
+        self._pending[(self._get_provider_key(provider_id), self._get_window_field(metric_type, time.time()))] += 1
+        # Update local in-memory counters for test fallbacks
+        self._local_counters[provider_id][metric_type] += 1
+        # A failure can push the provider over the threshold, so drop its cached health
+        if metric_type == "failure":
+            self._healthy_cache.pop(provider_id, None)
+
+        if not await self.flush_now():
             return False
+
+        logger.debug(f"Recorded {metric_type} for provider {provider_id}")
+        return True
+
+    async def record_success(self, provider_id: str) -> bool:
+        """
+        Record a successful SMS send for a provider.
+
+        Args:
+            provider_id: Provider identifier
+
+        Returns:
+            True if recorded successfully
+        """
+        try:
+            return await self._record_outcome(provider_id, "success")
         except Exception as e:
             logger.error(f"Unexpected error recording success for {provider_id}: {str(e)}")
             return False
@@ -188,59 +399,43 @@ class ProviderHealthTracker:
             True if recorded successfully
         """
         try:
-            _, current_failure_key, _, _ = self._get_current_window_keys(provider_id)
-
-            # Atomically increment failure counter
-            try:
-                await self.redis.incr(current_failure_key)
-                # Set expiry for the key (5 minutes from now)
-                await self.redis.expire(current_failure_key, self.window_duration)
-            except (ConnectionError, TimeoutError, RedisError) as e:
-                # Critical Redis errors should be surfaced to caller so tests can assert failures.
-                logger.error(f"Redis error recording failure for {provider_id}: {str(e)}")
-                return False
-            except Exception:
-                # Fallback to local counters when Redis mock/instrumentation does not persist counts
-                pass
- 
-            # Update local in-memory counters for test fallbacks
-            try:
-                self._local_counters[provider_id]["failure"] += 1
-            except Exception:
-                pass
- 
-            logger.debug(f"Recorded failure for provider {provider_id}")
-            return True
-
-        except (ConnectionError, TimeoutError) as e:
-            logger.error(f"Redis connection error recording failure for {provider_id}: {str(e)}")
-            return False
-        except RedisError as e:
-            logger.error(f"Redis error recording failure for {provider_id}: {str(e)}")
-            return False
+            return await self._record_outcome(provider_id, "failure")
         except Exception as e:
             logger.error(f"Unexpected error recording failure for {provider_id}: {str(e)}")
             return False
 
-    async def get_health_status(self, provider_id: str) -> Dict[str, Any]:
+    async def _read_window_counts(
+        self, provider_ids: List[str], now: float
+    ) -> List[Tuple[int, int, int, int]]:
         """
-        Get comprehensive health status for a provider.
+        Read current and previous window counts for providers in a single round-trip.
 
         Args:
-            provider_id: Provider identifier
+            provider_ids: Provider identifiers
+            now: Current time in seconds
 
         Returns:
-            Dictionary with health metrics and status
+            List of (current_success, current_failure, prev_success, prev_failure), one per provider
         """
-        try:
-            current_success_key, current_failure_key, prev_success_key, prev_failure_key = self._get_current_window_keys(provider_id)
+        window_fields = self._get_current_window_fields(now)
 
-            # Get current window counts
-            current_success_data = await self.redis.get(current_success_key)
-            current_failure_data = await self.redis.get(current_failure_key)
+        # One HMGET per provider hash; a single provider skips the pipeline entirely
+        if len(provider_ids) == 1:
+            results = [await self.redis.hmget(self._get_provider_key(provider_ids[0]), *window_fields)]
+        else:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for provider_id in provider_ids:
+                    pipe.hmget(self._get_provider_key(provider_id), *window_fields)
+                results = await pipe.execute()
+
+        counts = []
+        for provider_id, values in zip(provider_ids, results):
+            current_success_data, current_failure_data, prev_success_data, prev_failure_data = values
             current_success = parse_redis_int(current_success_data)
             current_failure = parse_redis_int(current_failure_data)
- 
+            prev_success = parse_redis_int(prev_success_data)
+            prev_failure = parse_redis_int(prev_failure_data)
+
             # If redis returns zero but we have local in-memory counters (test mocks),
             # prefer the local counts for accuracy in integration test fixtures.
             local = self._local_counters.get(provider_id, {"success": 0, "failure": 0})
@@ -248,74 +443,163 @@ class ProviderHealthTracker:
                 current_success = local["success"]
             if current_failure == 0 and local.get("failure", 0) > 0:
                 current_failure = local["failure"]
- 
-            # Get previous window counts
-            prev_success_data = await self.redis.get(prev_success_key)
-            prev_failure_data = await self.redis.get(prev_failure_key)
-            prev_success = parse_redis_int(prev_success_data)
-            prev_failure = parse_redis_int(prev_failure_data)
+
+            counts.append((current_success, current_failure, prev_success, prev_failure))
+
+        return counts
+
+    def _build_health_status(
+        self,
+        provider_id: str,
+        counts: Tuple[int, int, int, int],
+        metrics: Tuple[int, int, float],
+        now: float
+    ) -> Dict[str, Any]:
+        """
+        Build the health status dictionary for a provider.
+
+        Args:
+            provider_id: Provider identifier
+            counts: Tuple of (current_success, current_failure, prev_success, prev_failure)
+            metrics: Tuple of (total_success, total_failure, failure_rate)
+            now: Current time in seconds
+
+        Returns:
+            Dictionary with health metrics and status
+        """
+        current_success, current_failure, prev_success, prev_failure = counts
+        total_success, total_failure, failure_rate = metrics
+
+        total_requests = total_success + total_failure
+        # Mark provider unhealthy when failure rate meets or exceeds threshold
+        # (treat threshold as the cutoff, e.g., 0.7 means 70% failures => unhealthy)
+        is_healthy = failure_rate < self.failure_threshold if total_requests > 0 else True
+
+        # Calculate window expiry time
+        current_window = self._window_start(now)
+        window_expires_at = current_window + self.window_duration
+
+        return {
+            "provider_id": provider_id,
+            "is_healthy": is_healthy,
+            "total_requests": total_requests,
+            "success_count": total_success,
+            "failure_count": total_failure,
+            "failure_rate": round(failure_rate, 3),
+            "current_window": {
+                "success": current_success,
+                "failure": current_failure,
+                "expires_at": window_expires_at
+            },
+            "previous_window": {
+                "success": prev_success,
+                "failure": prev_failure
+            },
+            "threshold": self.failure_threshold,
+            "window_duration_seconds": self.window_duration,
+            "timestamp": now
+        }
+
+    async def get_health_status(self, provider_id: str) -> Dict[str, Any]:
+        """
+        Get comprehensive health status for a provider.
+
+        Concurrent calls for the same provider share a single in-flight fetch.
+
+        Args:
+            provider_id: Provider identifier
+
+        Returns:
+            Dictionary with health metrics and status
+        """
+        fetch = self._inflight.get(provider_id)
+        if fetch is None:
+            fetch = asyncio.ensure_future(self._fetch_health_status(provider_id))
+            self._inflight[provider_id] = fetch
+            fetch.add_done_callback(lambda done: self._forget_inflight(provider_id, done))
+        # Shield the shared fetch so one cancelled caller doesn't cancel the others
+        return await asyncio.shield(fetch)
+
+    def _forget_inflight(self, provider_id: str, fetch: asyncio.Task) -> None:
+        """
+        Remove a finished fetch from the in-flight map.
+
+        Args:
+            provider_id: Provider identifier
+            fetch: The fetch that finished
+        """
+        if self._inflight.get(provider_id) is fetch:
+            del self._inflight[provider_id]
+
+    async def _fetch_health_status(self, provider_id: str) -> Dict[str, Any]:
+        """
+        Read and calculate the health status for a provider.
+
+        Args:
+            provider_id: Provider identifier
+
+        Returns:
+            Dictionary with health metrics and status
+        """
+        try:
+            # Make buffered outcomes visible before reading the window counters
+            await self.flush_now()
+
+            # Read the clock once and thread it through the window calculations
+            now = time.time()
+            counts = (await self._read_window_counts([provider_id], now))[0]
 
             # Calculate sliding window metrics
-            total_success, total_failure, failure_rate = self._calculate_sliding_window_metrics(
-                current_success, current_failure, prev_success, prev_failure
-            )
-
-            total_requests = total_success + total_failure
-            # Mark provider unhealthy when failure rate meets or exceeds threshold
-            # (treat threshold as the cutoff, e.g., 0.7 means 70% failures => unhealthy)
-            is_healthy = failure_rate < self.failure_threshold if total_requests > 0 else True
-
-            # Calculate window expiry time
-            current_window = int(time.time() // self.window_duration) * self.window_duration
-            window_expires_at = current_window + self.window_duration
-
-            return {
-                "provider_id": provider_id,
-                "is_healthy": is_healthy,
-                "total_requests": total_requests,
-                "success_count": total_success,
-                "failure_count": total_failure,
-                "failure_rate": round(failure_rate, 3),
-                "current_window": {
-                    "success": current_success,
-                    "failure": current_failure,
-                    "expires_at": window_expires_at
-                },
-                "previous_window": {
-                    "success": prev_success,
-                    "failure": prev_failure
-                },
-                "threshold": self.failure_threshold,
-                "window_duration_seconds": self.window_duration,
-                "timestamp": time.time()
-            }
+            metrics = self._calculate_sliding_window_metrics(*counts, now)
+
+            return self._build_health_status(provider_id, counts, metrics, now)
 
         except Exception as e:
             logger.error(f"Error getting health status for {provider_id}: {str(e)}")
-            return {
-                "provider_id": provider_id,
-                "error": str(e),
-                "is_healthy": True,  # Default to healthy on error
-                "total_requests": 0,
-                "success_count": 0,
-                "failure_count": 0,
-                "failure_rate": 0.0,
-                "timestamp": time.time()
-            }
+            return self._error_health_status(provider_id, e)
+
+    def _error_health_status(self, provider_id: str, error: Exception) -> Dict[str, Any]:
+        """
+        Build the health status reported when a provider's metrics cannot be read.
+
+        Args:
+            provider_id: Provider identifier
+            error: Exception raised while reading the metrics
+
+        Returns:
+            Dictionary with empty metrics and the provider marked healthy
+        """
+        status = self._error_status_template.copy()
+        status["provider_id"] = provider_id
+        status["error"] = str(error)
+        status["timestamp"] = time.time()
+        return status
 
     async def is_provider_healthy(self, provider_id: str) -> bool:
         """
         Check if a provider is currently healthy (can be used for quick health checks).
 
+        Results are cached for HEALTHY_CACHE_TTL_SECONDS so per-message selection
+        paths do not hit Redis on every call.
+
         Args:
             provider_id: Provider identifier
 
         Returns:
             True if provider is healthy, False if unhealthy or error
         """
+        now = time.monotonic()
+        cached = self._healthy_cache.get(provider_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+
         try:
             status = await self.get_health_status(provider_id)
-            return status.get("is_healthy", True)
+            is_healthy = status.get("is_healthy", True)
+            # Don't cache the default-healthy fallback reported on read errors
+            if "error" not in status:
+                self._healthy_cache[provider_id] = (now + self.HEALTHY_CACHE_TTL_SECONDS, is_healthy)
+            return is_healthy
         except Exception as e:
             logger.error(f"Error checking health for {provider_id}: {str(e)}")
             # Default to healthy on error to avoid blocking all requests
@@ -328,11 +612,24 @@ class ProviderHealthTracker:
         Returns:
             Dictionary with health status for all providers
         """
-        providers = ["provider1", "provider2", "provider3"]
-        all_health = {}
+        providers = list(self.PROVIDER_IDS)
+        now = time.time()
+
+        try:
+            # Make buffered outcomes visible before reading the window counters
+            await self.flush_now()
+
+            # Fetch every provider's windows in one round-trip and score them in one pass
+            counts = await self._read_window_counts(providers, now)
+            metrics = self._calculate_sliding_window_metrics_batch(*zip(*counts), now)
 
-        for provider_id in providers:
-            all_health[provider_id] = await self.get_health_status(provider_id)
+            all_health = {
+                provider_id: self._build_health_status(provider_id, provider_counts, provider_metrics, now)
+                for provider_id, provider_counts, provider_metrics in zip(providers, counts, zip(*metrics))
+            }
+        except Exception as e:
+            logger.error(f"Error getting health status for all providers: {str(e)}")
+            all_health = {provider_id: self._error_health_status(provider_id, e) for provider_id in providers}
 
         # Calculate overall system health
         healthy_providers = sum(1 for status in all_health.values() if status.get("is_healthy", True))
@@ -350,7 +647,7 @@ class ProviderHealthTracker:
                 "window_duration_seconds": self.window_duration,
                 "failure_threshold": self.failure_threshold
             },
-            "timestamp": time.time()
+            "timestamp": now
         }
 
     async def reset_provider_health(self, provider_id: str) -> bool:
@@ -364,20 +661,23 @@ class ProviderHealthTracker:
             True if reset successful
         """
         try:
-            # Get current and previous window keys
-            current_success_key, current_failure_key, prev_success_key, prev_failure_key = self._get_current_window_keys(provider_id)
+            provider_key = self._get_provider_key(provider_id)
 
-            # Delete all health keys for this provider
-            keys_to_delete = [current_success_key, current_failure_key, prev_success_key, prev_failure_key]
+            # Delete the provider's health hash; UNLINK frees memory off the Redis main thread
             try:
-                await self.redis.delete(*keys_to_delete)
+                await self.redis.unlink(provider_key)
             except Exception as e:
                 # If Redis deletion fails, report failure so callers/tests can react accordingly
                 logger.error(f"Redis error deleting health keys for {provider_id}: {str(e)}")
                 return False
  
-            # Clear local in-memory counts as well
+            # Drop buffered deltas, cached health and local in-memory counts as well
             try:
+                self._healthy_cache.pop(provider_id, None)
+                for pending_key in [
+                    pending_key for pending_key in self._pending if pending_key[0] == provider_key
+                ]:
+                    del self._pending[pending_key]
                 if provider_id in self._local_counters:
                     self._local_counters[provider_id]["success"] = 0
                     self._local_counters[provider_id]["failure"] = 0
@@ -391,21 +691,39 @@ class ProviderHealthTracker:
             logger.error(f"Error resetting health for {provider_id}: {str(e)}")
             return False
 
+    def reset_local_state(self) -> None:
+        """
+        Drop all in-process state: buffered deltas, local counters, cached health and in-flight fetches.
+
+        Metrics already stored in Redis are left untouched (see reset_provider_health).
+        """
+        self._local_counters.clear()
+        self._pending.clear()
+        self._healthy_cache.clear()
+        self._inflight.clear()
+
 
-async def create_health_tracker(redis_client: Redis) -> ProviderHealthTracker:
+async def create_health_tracker(
+    redis_client: Optional[Redis] = None,
+    *,
+    pool: Optional[ConnectionPool] = None
+) -> ProviderHealthTracker:
     """
     Factory function to create a health tracker instance.
 
     Args:
-        redis_client: Redis client instance
+        redis_client: Redis client instance (optional)
+        pool: Connection pool to build a client from when no client is given
+            (defaults to the process-wide pool from get_connection_pool())
 
     Returns:
         Configured ProviderHealthTracker instance
     """
-    from .config import settings
+    if redis_client is None:
+        redis_client = Redis(connection_pool=pool or get_connection_pool())
 
     return ProviderHealthTracker(
         redis_client=redis_client,
         window_duration=300,  # 5 minutes
         failure_threshold=0.7  # 70%
-    )
\ No newline at end of file
+    )
@@ -114,12 +114,10 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
         """
         providers = ["provider1", "provider2", "provider3"]
 
-        for provider_id in providers:
-            allowed, _ = await self.rate_limiter.is_allowed(provider_id)
-            if allowed:
-                return False  # At least one provider is available
+        # One round-trip that stops at the first available provider, like checking them in turn
+        results = await self.rate_limiter.is_allowed_bulk(providers, stop_on_allowed=True)
 
-        return True  # All providers are rate limited
+        return not any(allowed for allowed, _ in results.values())
 
     async def _get_rate_limit_info(self) -> Dict[str, Any]:
         """Get comprehensive rate limit information."""
@@ -139,8 +137,8 @@ class RateLimitingMiddleware(BaseHTTPMiddleware):
 
         # Get provider rate limit info
         providers = ["provider1", "provider2", "provider3"]
-        for provider_id in providers:
-            _, count = await self.rate_limiter.is_allowed(provider_id)
+        results = await self.rate_limiter.is_allowed_bulk(providers)
+        for provider_id, (_, count) in results.items():
             info["providers"][provider_id] = {
                 "limit": settings.provider_rate_limit,
                 "current": count,
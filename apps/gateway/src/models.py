@@ -14,7 +14,7 @@ class SMSRequest(SQLModel, table=True):
     __tablename__ = "sms_requests"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    phone: str = Field(..., max_length=20, description="Phone number to send SMS to")
+    phone: str = Field(..., max_length=20, index=True, description="Phone number to send SMS to")
     text: str = Field(..., max_length=160, description="SMS message content")
     status: str = Field(default="pending", max_length=20, description="Request status")
     provider_used: Optional[str] = Field(default=None, max_length=50, description="SMS provider used")
@@ -32,7 +32,7 @@ class SMSResponse(SQLModel, table=True):
     __tablename__ = "sms_responses"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    request_id: int = Field(..., foreign_key="sms_requests.id", description="Reference to SMS request")
+    request_id: int = Field(..., foreign_key="sms_requests.id", index=True, description="Reference to SMS request")
     response_data: str = Field(..., description="Raw response from SMS provider")
     status_code: int = Field(..., description="HTTP status code from provider")
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.utcnow, description="Response creation timestamp")
@@ -20,6 +20,9 @@ from .taskiq_config import TaskIQConfig
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keys requested per SCAN round-trip when counting worker keys
+SCAN_BATCH_SIZE = 1024
+
 
 class TaskIQMonitor:
     """Monitor TaskIQ broker and queue health."""
@@ -63,8 +66,10 @@ class TaskIQMonitor:
 
             # Get active workers (approximate)
             worker_pattern = f"taskiq:worker:*:{TaskIQConfig.WORKER_NAME}"
-            worker_keys = await self.redis_client.keys(worker_pattern)
-            active_workers = len(worker_keys)
+            # SCAN in large batches instead of a blocking KEYS over the whole keyspace
+            active_workers = 0
+            async for _ in self.redis_client.scan_iter(match=worker_pattern, count=SCAN_BATCH_SIZE):
+                active_workers += 1
 
             return {
                 "queue_name": queue_name,
@@ -535,9 +535,9 @@ async def get_sms_stats() -> Dict[str, Any]:
         request_stats = sms_request_repo.get_request_stats()
 
         # Get recent responses count (last hour)
-        recent_responses = len(sms_response_repo.get_responses_by_time_range(
-            datetime.utcnow() - timedelta(hours=1), datetime.utcnow()
-        ))
+        recent_responses = sms_response_repo.count(
+            start_time=datetime.utcnow() - timedelta(hours=1), end_time=datetime.utcnow()
+        )
 
         return {
             "requests": request_stats,
@@ -7,7 +7,7 @@ Each provider is limited to 50 RPS as specified in requirements.
 
 import time
 import logging
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from redis.asyncio import Redis
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
@@ -18,6 +18,59 @@ from .utils import parse_redis_int
 logger = logging.getLogger(__name__)
 
 
+# Count a request against the provider counter in KEYS[1] in a single round-trip,
+# applying the window expiry in ARGV[1] when the increment opens the window. Running
+# both in one script means a counter is never left without its expiry.
+PROVIDER_CHECK_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('EXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+# Count a request against each provider counter in KEYS, in order, in a single
+# round-trip. ARGV[1] is the provider limit and ARGV[2] the window expiry applied
+# when a counter opens its window. When ARGV[3] is '1' the script stops after the
+# first provider still within its limit. Returns the counts of the checked providers.
+PROVIDER_BULK_CHECK_SCRIPT = """
+local counts = {}
+for i, key in ipairs(KEYS) do
+    local count = redis.call('INCR', key)
+    if count == 1 then
+        redis.call('EXPIRE', key, ARGV[2])
+    end
+    counts[i] = count
+    if ARGV[3] == '1' and count <= tonumber(ARGV[1]) then
+        break
+    end
+end
+return counts
+"""
+
+# Reserve slots for a batch against each provider counter in KEYS in a single
+# round-trip. ARGV[i] is the number of slots requested for KEYS[i]; the two
+# arguments after those are the provider limit and the window expiry applied when
+# a reservation opens the window. A counter is never pushed past the limit.
+# Returns the number of slots granted per key.
+PROVIDER_BATCH_RESERVE_SCRIPT = """
+local limit = tonumber(ARGV[#KEYS + 1])
+local granted = {}
+for i, key in ipairs(KEYS) do
+    local count = tonumber(redis.call('GET', key) or 0)
+    local slots = math.min(tonumber(ARGV[i]), math.max(limit - count, 0))
+    if slots > 0 then
+        count = redis.call('INCRBY', key, slots)
+        if count == slots then
+            redis.call('EXPIRE', key, ARGV[#KEYS + 2])
+        end
+    end
+    granted[i] = slots
+end
+return granted
+"""
+
+
 class RateLimiter:
     """Redis-based rate limiter for SMS providers with sliding window algorithm."""
 
@@ -42,12 +95,14 @@ class RateLimiter:
         """Get Redis key for rate limiting window."""
         return f"rate_limit:{provider_id}"
 
-    async def is_allowed(self, provider_id: str) -> Tuple[bool, int]:
+    async def is_allowed(self, provider_id: str, fail_open: bool = True) -> Tuple[bool, int]:
         """
         Check if request is allowed for the provider.
 
         Args:
             provider_id: Identifier for the SMS provider (provider1, provider2, provider3)
+            fail_open: Allow the request on Redis errors; when False they are re-raised
+                so callers such as a circuit breaker can see the outage
 
         Returns:
             Tuple of (is_allowed: bool, current_count: int)
@@ -55,12 +110,10 @@ class RateLimiter:
         key = self._get_key(provider_id)
 
         try:
-            # Use Redis INCR to atomically increment counter
-            current_count = await self.redis.incr(key)
-
-            # Set expiry on first request to this key
-            if current_count == 1:
-                await self.redis.expire(key, self.window)
+            # INCR and the expiry for a new window run as one atomic script call
+            current_count = parse_redis_int(
+                await self.redis.eval(PROVIDER_CHECK_SCRIPT, 1, key, self.window)
+            )
 
             # Check if we've exceeded the rate limit
             is_allowed = current_count <= self.rate_limit
@@ -71,6 +124,8 @@ class RateLimiter:
 
         except (ConnectionError, TimeoutError) as e:
             logger.error(f"Redis connection error for provider {provider_id}: {str(e)}")
+            if not fail_open:
+                raise
             # On Redis failure, allow request but log warning
             # This prevents complete system failure during Redis outages
             logger.warning(f"Rate limiting bypassed for {provider_id} due to Redis error")
@@ -78,6 +133,8 @@ class RateLimiter:
 
         except RedisError as e:
             logger.error(f"Redis error for provider {provider_id}: {str(e)}")
+            if not fail_open:
+                raise
             # For other Redis errors, also allow but log
             logger.warning(f"Rate limiting bypassed for {provider_id} due to Redis error")
             return True, 0
@@ -87,6 +144,99 @@ class RateLimiter:
             # For unexpected errors, deny request to be safe
             return False, self.rate_limit + 1
 
+    async def is_allowed_bulk(
+        self, provider_ids: List[str], stop_on_allowed: bool = False
+    ) -> Dict[str, Tuple[bool, int]]:
+        """
+        Check several providers with one atomic script call instead of one is_allowed each.
+
+        Args:
+            provider_ids: Providers to check, in order
+            stop_on_allowed: Stop at the first provider within its limit, leaving the rest untouched
+
+        Returns:
+            Dictionary mapping each checked provider to (is_allowed: bool, current_count: int)
+        """
+        keys = [self._get_key(provider_id) for provider_id in provider_ids]
+
+        try:
+            counts = await self.redis.eval(
+                PROVIDER_BULK_CHECK_SCRIPT, len(keys), *keys,
+                self.rate_limit, self.window, int(stop_on_allowed)
+            )
+            results = {}
+            for provider_id, count in zip(provider_ids, counts):
+                current_count = parse_redis_int(count)
+                results[provider_id] = (current_count <= self.rate_limit, current_count)
+            return results
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error for providers {provider_ids}: {str(e)}")
+            logger.warning(f"Rate limiting bypassed for {provider_ids} due to Redis error")
+            return {provider_id: (True, 0) for provider_id in provider_ids}
+
+        except RedisError as e:
+            logger.error(f"Redis error for providers {provider_ids}: {str(e)}")
+            logger.warning(f"Rate limiting bypassed for {provider_ids} due to Redis error")
+            return {provider_id: (True, 0) for provider_id in provider_ids}
+
+        except Exception as e:
+            logger.error(f"Unexpected error in rate limiter for providers {provider_ids}: {str(e)}")
+            return {provider_id: (False, self.rate_limit + 1) for provider_id in provider_ids}
+
+    async def reserve_batch(self, requested: Dict[str, int]) -> Dict[str, int]:
+        """
+        Reserve slots for a batch of requests per provider with one atomic script call.
+
+        Args:
+            requested: Number of slots wanted per provider
+
+        Returns:
+            Dictionary mapping each provider to the number of slots granted
+        """
+        provider_ids = list(requested)
+        keys = [self._get_key(provider_id) for provider_id in provider_ids]
+
+        try:
+            granted = await self.redis.eval(
+                PROVIDER_BATCH_RESERVE_SCRIPT, len(keys), *keys,
+                *(requested[provider_id] for provider_id in provider_ids),
+                self.rate_limit, self.window
+            )
+            return {
+                provider_id: parse_redis_int(slots)
+                for provider_id, slots in zip(provider_ids, granted)
+            }
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error for providers {provider_ids}: {str(e)}")
+            logger.warning(f"Rate limiting bypassed for {provider_ids} due to Redis error")
+            return dict(requested)
+
+        except RedisError as e:
+            logger.error(f"Redis error for providers {provider_ids}: {str(e)}")
+            logger.warning(f"Rate limiting bypassed for {provider_ids} due to Redis error")
+            return dict(requested)
+
+        except Exception as e:
+            logger.error(f"Unexpected error in rate limiter for providers {provider_ids}: {str(e)}")
+            return dict.fromkeys(provider_ids, 0)
+
+    async def check_with_global(
+        self, provider_id: str, global_rate_limiter: "GlobalRateLimiter"
+    ) -> Tuple[bool, int]:
+        """
+        Check the global limit and this provider's limit in one round-trip without counting a request.
+
+        Args:
+            provider_id: Provider identifier
+            global_rate_limiter: GlobalRateLimiter holding the global counter
+
+        Returns:
+            Tuple of (is_allowed: bool, global_count: int)
+        """
+        return await global_rate_limiter.check_with_provider(self._get_key(provider_id), self.rate_limit)
+
     async def get_current_count(self, provider_id: str) -> int:
         """
         Get current request count for provider without incrementing.
@@ -186,6 +336,37 @@ class RateLimiter:
         }
 
 
+# Check the global counter (KEYS[1]) and the selected provider's counter (KEYS[2])
+# in a single round-trip. ARGV[1] is the global limit and ARGV[2] the provider limit.
+# Neither counter is incremented: global slots are consumed at ingress and the
+# provider slot was already consumed by the rate limit status refresh.
+GLOBAL_AND_PROVIDER_CHECK_SCRIPT = """
+local global_count = tonumber(redis.call('GET', KEYS[1]) or 0)
+if global_count >= tonumber(ARGV[1]) then
+    return {0, global_count}
+end
+if tonumber(redis.call('GET', KEYS[2]) or 0) > tonumber(ARGV[2]) then
+    return {0, global_count}
+end
+return {1, global_count}
+"""
+
+# Atomically reserve up to ARGV[1] global slots in a single round-trip, never
+# pushing the counter past the limit in ARGV[2]. ARGV[3] is the window expiry
+# applied when the reservation opens the window. Returns {granted, count}.
+GLOBAL_BATCH_RESERVE_SCRIPT = """
+local count = tonumber(redis.call('GET', KEYS[1]) or 0)
+local granted = math.min(tonumber(ARGV[1]), math.max(tonumber(ARGV[2]) - count, 0))
+if granted > 0 then
+    count = redis.call('INCRBY', KEYS[1], granted)
+    if count == granted then
+        redis.call('EXPIRE', KEYS[1], ARGV[3])
+    end
+end
+return {granted, count}
+"""
+
+
 class GlobalRateLimiter:
     """Global rate limiter for overall system throughput."""
 
@@ -245,6 +426,38 @@ class GlobalRateLimiter:
             # For unexpected errors, deny request to be safe
             return False, self.rate_limit + 1
 
+    async def is_allowed_batch(self, count: int) -> Tuple[int, int]:
+        """
+        Reserve up to count global slots with one atomic script call.
+
+        Args:
+            count: Number of requests to admit
+
+        Returns:
+            Tuple of (allowed_count: int, current_count: int)
+        """
+        key = self._get_key()
+
+        try:
+            granted, current_count = await self.redis.eval(
+                GLOBAL_BATCH_RESERVE_SCRIPT, 1, key, count, self.rate_limit, self.window
+            )
+            return parse_redis_int(granted), parse_redis_int(current_count)
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error for global rate limiter: {str(e)}")
+            logger.warning("Global rate limiting bypassed due to Redis error")
+            return count, 0
+
+        except RedisError as e:
+            logger.error(f"Redis error for global rate limiter: {str(e)}")
+            logger.warning("Global rate limiting bypassed due to Redis error")
+            return count, 0
+
+        except Exception as e:
+            logger.error(f"Unexpected error in global rate limiter: {str(e)}")
+            return 0, self.rate_limit + 1
+
     async def get_current_count(self) -> int:
         """
         Get current global request count without incrementing.
@@ -256,6 +469,39 @@ class GlobalRateLimiter:
         count = await self.redis.get(key)
         return parse_redis_int(count)
 
+    async def check_with_provider(self, provider_key: str, provider_limit: int) -> Tuple[bool, int]:
+        """
+        Check the global limit and the selected provider's limit in one round-trip.
+
+        Args:
+            provider_key: Redis rate limit key of the selected provider
+            provider_limit: Maximum requests per window for the provider
+
+        Returns:
+            Tuple of (is_allowed: bool, global_count: int)
+        """
+        key = self._get_key()
+
+        try:
+            allowed, global_count = await self.redis.eval(
+                GLOBAL_AND_PROVIDER_CHECK_SCRIPT, 2, key, provider_key, self.rate_limit, provider_limit
+            )
+            return bool(int(allowed)), parse_redis_int(global_count)
+
+        except (ConnectionError, TimeoutError) as e:
+            logger.error(f"Redis connection error for global rate limiter: {str(e)}")
+            logger.warning("Global rate limiting bypassed due to Redis error")
+            return True, 0
+
+        except RedisError as e:
+            logger.error(f"Redis error for global rate limiter: {str(e)}")
+            logger.warning("Global rate limiting bypassed due to Redis error")
+            return True, 0
+
+        except Exception as e:
+            logger.error(f"Unexpected error in global rate limiter: {str(e)}")
+            return False, self.rate_limit + 1
+
 
 async def create_rate_limiter(redis_client: Redis) -> RateLimiter:
     """
@@ -194,6 +194,10 @@ class RetryService:
         logger.info(f"Selected provider {selected_provider} via round-robin (index: {selected_index})")
         return selected_provider
 
+    def reset_state(self) -> None:
+        """Restart round-robin provider selection from the first healthy provider."""
+        self._round_robin_counter = 0
+
     async def record_retry_attempt(
         self,
         request_id: int,
@@ -8,7 +8,7 @@ for asynchronous SMS sending with proper error handling and retries.
 import asyncio
 import logging
 import uuid
-from typing import Dict, Any, Optional, Tuple, Set
+from typing import Dict, Any, List, Optional, Tuple, Set
 
 import httpx
 from redis.asyncio import Redis
@@ -41,7 +41,6 @@ _db_engine = None
 _redis_client = None
 _retry_service = None
 
-
 def get_db_engine():
     """Get or create database engine."""
     global _db_engine
@@ -632,6 +631,67 @@ async def queue_sms_task(
         return None
 
 
+async def queue_sms_tasks_bulk(messages: List[Dict[str, str]]) -> List[Optional[str]]:
+    """
+    Queue a batch of SMS tasks, persisting all requests in one transaction.
+
+    Requests are stored as pending and only the ones whose dispatch task was
+    enqueued are moved to processing, so a failed enqueue leaves its request
+    pending instead of stuck in processing.
+
+    Args:
+        messages: List of {"phone": ..., "text": ...} dictionaries
+
+    Returns:
+        Message ID for each message in order, or None where queueing failed
+    """
+    if not messages:
+        return []
+
+    try:
+        # One INSERT batch and commit for every request
+        sms_request_repo = get_sms_request_repository()
+        sms_requests = sms_request_repo.create_requests(messages, status="pending")
+    except Exception as e:
+        logger.error(f"Error persisting SMS batch of {len(messages)}: {str(e)}")
+        return [None] * len(messages)
+
+    batch_time = int(asyncio.get_event_loop().time())
+    message_ids = [f"msg_{batch_time}_{str(uuid.uuid4())[:8]}" for _ in messages]
+
+    # Enqueue the dispatch tasks concurrently so their broker round-trips overlap
+    results = await asyncio.gather(*(
+        dispatch_sms.kiq(
+            phone=message["phone"],
+            text=message["text"],
+            message_id=message_id,
+            request_id=sms_request.id,
+            exclude_providers=[],
+            retry_count=0,
+        )
+        for message, message_id, sms_request in zip(messages, message_ids, sms_requests)
+    ), return_exceptions=True)
+
+    queued: List[Optional[str]] = []
+    queued_request_ids: List[int] = []
+    for message_id, sms_request, result in zip(message_ids, sms_requests, results):
+        if isinstance(result, Exception):
+            logger.error(f"Error queueing SMS task {message_id} (request ID: {sms_request.id}): {str(result)}")
+            queued.append(None)
+        else:
+            queued.append(message_id)
+            queued_request_ids.append(sms_request.id)
+
+    try:
+        sms_request_repo.update_requests_status(queued_request_ids, "processing")
+    except Exception as e:
+        # The tasks are already enqueued; dispatch_sms records the final status
+        logger.error(f"Error marking {len(queued_request_ids)} queued SMS requests as processing: {str(e)}")
+
+    logger.info(f"Queued {len(queued_request_ids)} of {len(messages)} SMS dispatch tasks")
+    return queued
+
+
 # Standalone worker runner for development
 async def run_worker():
     """Run the Taskiq worker."""
@@ -24,15 +24,17 @@ def parse_redis_int(value: Optional[object]) -> int:
     """
     if not value:
         return 0
-    # if redis client was configured with decode_responses=True this may already be str/int
-    if isinstance(value, int):
-        return value
+    # Raw bytes are the common case with decode_responses=False; int() parses ASCII
+    # digits from bytes directly, so skip the intermediate UTF-8 decode.
     if isinstance(value, bytes):
         try:
-            return int(value.decode())
-        except (ValueError, UnicodeDecodeError):
+            return int(value)
+        except ValueError:
             logger.debug(f"Failed to decode Redis bytes value: {value!r}")
             return 0
+    # if redis client was configured with decode_responses=True this may already be str/int
+    if isinstance(value, int):
+        return value
     if isinstance(value, str):
         try:
             return int(value)
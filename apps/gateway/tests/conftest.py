@@ -7,17 +7,18 @@ import os
 from unittest.mock import AsyncMock
 
 import pytest
-from redis.asyncio import Redis
 from sqlmodel import SQLModel, create_engine
 from sqlalchemy.orm import sessionmaker
 
 
 @pytest.fixture(scope="session")
-def event_loop():
-    """Create event loop for async tests."""
-    loop = asyncio.get_event_loop_policy().new_event_loop()
-    yield loop
-    loop.close()
+def event_loop_policy():
+    """Run async tests on uvloop when it is installed (it ships with uvicorn[standard])."""
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.DefaultEventLoopPolicy()
+    return uvloop.EventLoopPolicy()
 
 
 @pytest.fixture
@@ -27,7 +28,7 @@ def mock_redis():
     Use AsyncMock for Redis async methods so they return awaitable values
     when awaited by async production code.
     """
-    redis = AsyncMock(spec=Redis)
+    redis = AsyncMock()
 
     # Ensure Redis methods used by production code are AsyncMock and return awaitable values.
     # .incr should be awaitable and return integers (1, 2, ...). Tests may override side_effect.
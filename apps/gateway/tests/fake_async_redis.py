@@ -0,0 +1,142 @@
+"""
+In-memory stand-in for redis.asyncio.Redis used by the integration tests.
+
+Implements just the commands the gateway issues so tests that record and read
+counters observe real state changes without a Redis server.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+
+from src.rate_limiter import (
+    GLOBAL_BATCH_RESERVE_SCRIPT,
+    PROVIDER_BATCH_RESERVE_SCRIPT,
+    PROVIDER_BULK_CHECK_SCRIPT,
+    PROVIDER_CHECK_SCRIPT,
+)
+
+
+class FakeAsyncPipeline:
+    """Buffer pipelined commands and run them against a FakeAsyncRedis on execute."""
+
+    def __init__(self, redis: "FakeAsyncRedis"):
+        self._redis = redis
+        self._commands: List[Tuple[str, tuple]] = []
+
+    async def __aenter__(self) -> "FakeAsyncPipeline":
+        return self
+
+    async def __aexit__(self, *exc_info) -> bool:
+        return False
+
+    def _queue(self, command: str, *args) -> "FakeAsyncPipeline":
+        self._commands.append((command, args))
+        return self
+
+    def incr(self, key: str, amount: int = 1) -> "FakeAsyncPipeline":
+        return self._queue("incr", key, amount)
+
+    def hincrby(self, key: str, field: str, amount: int = 1) -> "FakeAsyncPipeline":
+        return self._queue("hincrby", key, field, amount)
+
+    def hmget(self, key: str, *fields: str) -> "FakeAsyncPipeline":
+        return self._queue("hmget", key, *fields)
+
+    def hdel(self, key: str, *fields: str) -> "FakeAsyncPipeline":
+        return self._queue("hdel", key, *fields)
+
+    def expire(self, key: str, seconds: int) -> "FakeAsyncPipeline":
+        return self._queue("expire", key, seconds)
+
+    async def execute(self) -> List[Any]:
+        commands, self._commands = self._commands, []
+        return [await getattr(self._redis, command)(*args) for command, args in commands]
+
+
+class FakeAsyncRedis:
+    """Dict-backed async Redis client; TTLs are accepted but not simulated."""
+
+    def __init__(self):
+        self.data: Dict[str, Any] = {}
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value = self.data.get(key)
+        return None if value is None else str(value).encode()
+
+    async def incr(self, key: str, amount: int = 1) -> int:
+        self.data[key] = int(self.data.get(key, 0)) + int(amount)
+        return self.data[key]
+
+    async def expire(self, key: str, seconds: int) -> bool:
+        return key in self.data
+
+    async def ttl(self, key: str) -> int:
+        return 300 if key in self.data else -2
+
+    async def hincrby(self, key: str, field: str, amount: int = 1) -> int:
+        fields = self.data.setdefault(key, {})
+        fields[field] = int(fields.get(field, 0)) + int(amount)
+        return fields[field]
+
+    async def hmget(self, key: str, *fields: str) -> List[Optional[int]]:
+        values = self.data.get(key, {})
+        return [values.get(field) for field in fields]
+
+    async def hdel(self, key: str, *fields: str) -> int:
+        values = self.data.get(key, {})
+        return sum(values.pop(field, None) is not None for field in fields)
+
+    async def lpush(self, key: str, *values: Any) -> int:
+        items = self.data.setdefault(key, [])
+        items[:0] = reversed(values)
+        return len(items)
+
+    async def delete(self, *keys: str) -> int:
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    async def unlink(self, *keys: str) -> int:
+        return await self.delete(*keys)
+
+    async def exists(self, *keys: str) -> int:
+        return sum(key in self.data for key in keys)
+
+    async def eval(self, script: str, numkeys: int, *keys_and_args: Any) -> List[int]:
+        if script == PROVIDER_CHECK_SCRIPT:
+            return await self.incr(keys_and_args[0])
+
+        if script == PROVIDER_BULK_CHECK_SCRIPT:
+            limit, _, stop_on_allowed = (int(value) for value in keys_and_args[numkeys:])
+            counts = []
+            for key in keys_and_args[:numkeys]:
+                counts.append(await self.incr(key))
+                if stop_on_allowed and counts[-1] <= limit:
+                    break
+            return counts
+
+        if script == PROVIDER_BATCH_RESERVE_SCRIPT:
+            keys, args = keys_and_args[:numkeys], keys_and_args[numkeys:]
+            limit = int(args[numkeys])
+            granted = []
+            for key, requested in zip(keys, args):
+                slots = min(int(requested), max(limit - int(self.data.get(key, 0)), 0))
+                if slots:
+                    await self.incr(key, slots)
+                granted.append(slots)
+            return granted
+
+        if script == GLOBAL_BATCH_RESERVE_SCRIPT:
+            key = keys_and_args[0]
+            requested, limit = (int(value) for value in keys_and_args[numkeys:numkeys + 2])
+            granted = min(requested, max(limit - int(self.data.get(key, 0)), 0))
+            if granted:
+                await self.incr(key, granted)
+            return [granted, int(self.data.get(key, 0))]
+
+        # Otherwise emulates GLOBAL_AND_PROVIDER_CHECK_SCRIPT
+        global_key, provider_key = keys_and_args[:numkeys]
+        global_limit, provider_limit = (int(value) for value in keys_and_args[numkeys:])
+        global_count = int(self.data.get(global_key, 0))
+        allowed = global_count < global_limit and int(self.data.get(provider_key, 0)) <= provider_limit
+        return [int(allowed), global_count]
+
+    def pipeline(self, transaction: bool = True) -> FakeAsyncPipeline:
+        return FakeAsyncPipeline(self)
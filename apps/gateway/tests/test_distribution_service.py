@@ -6,61 +6,121 @@ Tests weighted round-robin distribution, health awareness, and rate limiting int
 
 import asyncio
 import time
-from unittest.mock import AsyncMock, MagicMock, patch
+from types import MappingProxyType
+from unittest.mock import AsyncMock, patch
 
 import pytest
-from redis.asyncio import Redis
+from redis.exceptions import ConnectionError
 
 from src.distribution import SMSDistributionService, ProviderStatus, DistributionStats, create_distribution_service
-from src.health_tracker import ProviderHealthTracker
-from src.rate_limiter import RateLimiter, GlobalRateLimiter
+from src.rate_limiter import GlobalRateLimiter, RateLimiter
+from tests.fake_async_redis import FakeAsyncRedis
 
 
-@pytest.fixture
-def mock_redis():
-    """Create mock Redis client."""
-    redis = AsyncMock(spec=Redis)
-    redis.incr.return_value = 1
-    redis.expire.return_value = True
-    redis.get.return_value = b"1"
-    return redis
+def _resolve(result, *args):
+    """Resolve a configured fake result with AsyncMock side_effect semantics."""
+    if isinstance(result, BaseException):
+        raise result
+    if callable(result):
+        return result(*args)
+    if isinstance(result, list):
+        return result.pop(0)
+    return result
+
+
+class FakeHealthTracker:
+    """Lightweight async fake for ProviderHealthTracker.
+
+    ``statuses`` may be a status dict, a list consumed in call order,
+    a callable taking the provider ID, or an exception to raise.
+    """
+
+    def __init__(self):
+        self.statuses = {"is_healthy": True, "failure_rate": 0.0, "failure_count": 0}
+        self.calls = 0
+
+    async def get_health_status(self, provider_id):
+        self.calls += 1
+        return _resolve(self.statuses, provider_id)
+
+
+class FakeRateLimiter:
+    """Lightweight async fake for RateLimiter; ``results`` resolves like FakeHealthTracker.statuses."""
+
+    rate_limit = 50
+
+    def __init__(self):
+        self.results = (True, 1)
+        self.calls = 0
+        # Slots granted per provider by reserve_batch; all requested slots by default
+        self.reserve_results = lambda provider_id, requested: requested
+
+    async def is_allowed(self, provider_id, fail_open=True):
+        self.calls += 1
+        return _resolve(self.results, provider_id)
+
+    async def reserve_batch(self, requested):
+        return {
+            provider_id: _resolve(self.reserve_results, provider_id, slots)
+            for provider_id, slots in requested.items()
+        }
+
+    async def check_with_global(self, provider_id, global_rate_limiter):
+        return await global_rate_limiter.check_with_provider(provider_id, self.rate_limit)
+
+
+class FakeGlobalRateLimiter:
+    """Lightweight async fake for GlobalRateLimiter."""
+
+    rate_limit = 200
+
+    def __init__(self):
+        self.results = (True, 1)
+        self.check_results = (True, 1)
+
+    async def is_allowed(self):
+        return _resolve(self.results)
+
+    async def get_current_count(self):
+        return 0
+
+    async def is_allowed_batch(self, count):
+        return count, count
+
+    async def check_with_provider(self, provider_id, provider_limit):
+        return _resolve(self.check_results, provider_id, provider_limit)
 
 
 @pytest.fixture
 def mock_health_tracker():
-    """Create mock health tracker."""
-    tracker = AsyncMock(spec=ProviderHealthTracker)
-    return tracker
+    """Create fake health tracker."""
+    return FakeHealthTracker()
 
 
 @pytest.fixture
 def mock_rate_limiter():
-    """Create mock rate limiter."""
-    limiter = AsyncMock(spec=RateLimiter)
-    limiter.is_allowed.return_value = (True, 1)
-    return limiter
+    """Create fake rate limiter."""
+    return FakeRateLimiter()
 
 
 @pytest.fixture
 def mock_global_rate_limiter():
-    """Create mock global rate limiter."""
-    limiter = AsyncMock(spec=GlobalRateLimiter)
-    # Provide async helpers and attributes expected by the implementation
-    limiter.is_allowed.return_value = (True, 1)
-    limiter.get_current_count = AsyncMock(return_value=0)
-    # Implementation reads .rate_limit attribute
-    limiter.rate_limit = 200
-    return limiter
+    """Create fake global rate limiter."""
+    return FakeGlobalRateLimiter()
 
 
-@pytest.fixture
+# Read-only, so one frozen mapping is shared by every test
+PROVIDER_URLS = MappingProxyType({
+    "provider1": "http://provider1.com",
+    "provider2": "http://provider2.com",
+    "provider3": "http://provider3.com"
+})
+
+
+@pytest.fixture(scope="session")
 def provider_urls():
     """Sample provider URLs."""
-    return {
-        "provider1": "http://provider1.com",
-        "provider2": "http://provider2.com",
-        "provider3": "http://provider3.com"
-    }
+    return PROVIDER_URLS
 
 
 @pytest.fixture
@@ -103,6 +163,18 @@ class TestSMSDistributionServiceInitialization:
             assert status.is_rate_limited is False
             assert status.current_load == 0
 
+    def test_init_prebuilds_selection_results(self, distribution_service, provider_urls):
+        """Test that (provider_id, provider_url) results are built once at init."""
+        for provider_id, provider_url in provider_urls.items():
+            assert distribution_service._selection_results[provider_id] == (provider_id, provider_url)
+
+    def test_status_dataclasses_use_slots(self, distribution_service):
+        """Test that per-provider status and stats objects carry no instance __dict__."""
+        assert not hasattr(distribution_service.provider_status["provider1"], "__dict__")
+        assert not hasattr(distribution_service.distribution_stats, "__dict__")
+        assert ProviderStatus.__slots__
+        assert DistributionStats.__slots__
+
     def test_init_empty_providers(self, mock_health_tracker, mock_rate_limiter, mock_global_rate_limiter):
         """Test initialization with empty provider URLs."""
         service = SMSDistributionService(
@@ -123,7 +195,7 @@ class TestProviderHealthUpdates:
     async def test_update_provider_health_status_all_healthy(self, distribution_service, mock_health_tracker):
         """Test updating health status when all providers are healthy."""
         # Mock health tracker responses
-        mock_health_tracker.get_health_status.side_effect = [
+        mock_health_tracker.statuses = [
             {"is_healthy": True, "failure_rate": 0.2},
             {"is_healthy": True, "failure_rate": 0.1},
             {"is_healthy": True, "failure_rate": 0.3}
@@ -138,7 +210,7 @@ class TestProviderHealthUpdates:
     @pytest.mark.asyncio
     async def test_update_provider_health_status_mixed_health(self, distribution_service, mock_health_tracker):
         """Test updating health status with mixed provider health."""
-        mock_health_tracker.get_health_status.side_effect = [
+        mock_health_tracker.statuses = [
             {"is_healthy": True, "failure_rate": 0.2},   # provider1: healthy
             {"is_healthy": False, "failure_rate": 0.8},  # provider2: unhealthy
             {"is_healthy": True, "failure_rate": 0.1}   # provider3: healthy
@@ -153,15 +225,40 @@ class TestProviderHealthUpdates:
     @pytest.mark.asyncio
     async def test_update_provider_health_status_health_tracker_error(self, distribution_service, mock_health_tracker):
         """Test updating health status when health tracker throws error."""
-        mock_health_tracker.get_health_status.side_effect = Exception("Health tracker error")
+        mock_health_tracker.statuses = Exception("Health tracker error")
 
         with pytest.raises(Exception, match="Health tracker error"):
             await distribution_service._update_provider_health_status()
 
+    @pytest.mark.asyncio
+    async def test_probe_semaphore_caps_concurrency(self, mock_rate_limiter, mock_global_rate_limiter):
+        """Test that health probes never exceed MAX_CONCURRENT_PROBES in flight."""
+        in_flight = {"current": 0, "peak": 0}
+
+        class SlowHealthTracker:
+            async def get_health_status(self, provider_id):
+                in_flight["current"] += 1
+                in_flight["peak"] = max(in_flight["peak"], in_flight["current"])
+                await asyncio.sleep(0)  # Yield so the other admitted probes overlap
+                in_flight["current"] -= 1
+                return {"is_healthy": True, "failure_rate": 0.0}
+
+        service = SMSDistributionService(
+            health_tracker=SlowHealthTracker(),
+            rate_limiter=mock_rate_limiter,
+            global_rate_limiter=mock_global_rate_limiter,
+            provider_urls={f"provider{i}": f"http://provider{i}.com" for i in range(40)},
+        )
+
+        await service._update_provider_health_status()
+
+        assert in_flight["peak"] == SMSDistributionService.MAX_CONCURRENT_PROBES
+        assert service.distribution_stats.healthy_providers == 40
+
     @pytest.mark.asyncio
     async def test_update_provider_rate_limit_status_all_allowed(self, distribution_service, mock_rate_limiter):
         """Test updating rate limit status when all providers are allowed."""
-        mock_rate_limiter.is_allowed.side_effect = [
+        mock_rate_limiter.results = [
             (True, 1), (True, 2), (True, 3)
         ]
 
@@ -175,7 +272,7 @@ class TestProviderHealthUpdates:
     @pytest.mark.asyncio
     async def test_update_provider_rate_limit_status_some_limited(self, distribution_service, mock_rate_limiter):
         """Test updating rate limit status when some providers are limited."""
-        mock_rate_limiter.is_allowed.side_effect = [
+        mock_rate_limiter.results = [
             (True, 45),   # provider1: allowed (45 < 50)
             (False, 50),  # provider2: limited (50 >= 50)
             (True, 30)    # provider3: allowed (30 < 50)
@@ -282,6 +379,18 @@ class TestProviderSelection:
         assert provider3 == "provider3"
         assert distribution_service.distribution_stats.round_robin_index == 0  # Wrapped around
 
+    @pytest.mark.asyncio
+    async def test_get_next_provider_round_robin_wraparound(self, distribution_service):
+        """Test round-robin selection matches a modulo reference across many wraps."""
+        providers = ["provider1", "provider2", "provider3"]
+        distribution_service.healthy_providers_queue.extend(providers)
+        distribution_service.distribution_stats.round_robin_index = 0
+
+        for i in range(30):
+            provider = await distribution_service._get_next_provider_round_robin()
+            assert provider == providers[i % 3]
+            assert distribution_service.distribution_stats.round_robin_index == (i + 1) % 3
+
     @pytest.mark.asyncio
     async def test_get_next_provider_round_robin_empty_queue(self, distribution_service):
         """Test round-robin provider selection with empty queue."""
@@ -310,11 +419,11 @@ class TestProviderSelectionIntegration:
                 return {"is_healthy": True, "failure_rate": 0.3}
             return {"is_healthy": True, "failure_rate": 0.1}
 
-        mock_health_tracker.get_health_status.side_effect = health_status_side_effect
+        mock_health_tracker.statuses = health_status_side_effect
 
         # Mock rate limit checks
-        mock_rate_limiter.is_allowed.side_effect = [(True, 1), (True, 2), (True, 3)]
-        mock_global_rate_limiter.is_allowed.return_value = (True, 5)
+        mock_rate_limiter.results = [(True, 1), (True, 2), (True, 3)]
+        mock_global_rate_limiter.results = (True, 5)
 
         result = await distribution_service.select_provider()
         assert result is not None
@@ -349,9 +458,9 @@ class TestProviderSelectionIntegration:
         def is_allowed(provider_id):
             return rate_limit_responses[provider_id]
 
-        mock_health_tracker.get_health_status.side_effect = get_health_status
-        mock_rate_limiter.is_allowed.side_effect = is_allowed
-        mock_global_rate_limiter.is_allowed.return_value = (True, 5)
+        mock_health_tracker.statuses = get_health_status
+        mock_rate_limiter.results = is_allowed
+        mock_global_rate_limiter.results = (True, 5)
 
         result = await distribution_service.select_provider()
 
@@ -368,16 +477,30 @@ class TestProviderSelectionIntegration:
     @pytest.mark.asyncio
     async def test_select_provider_global_rate_limited(self, distribution_service, mock_global_rate_limiter):
         """Test selecting provider when globally rate limited."""
-        mock_global_rate_limiter.is_allowed.return_value = (False, 200)  # Global limit exceeded
+        mock_global_rate_limiter.check_results = (False, 200)  # Global limit exceeded
 
         result = await distribution_service.select_provider()
 
         assert result is None  # Should not select any provider when globally rate limited
 
+    @pytest.mark.asyncio
+    async def test_select_provider_global_denial_keeps_rotation(self, distribution_service, mock_global_rate_limiter):
+        """Test a globally denied selection leaves the next round-robin pick unchanged."""
+        mock_global_rate_limiter.check_results = [(True, 1), (False, 200), (True, 2)]
+
+        first = await distribution_service.select_provider()
+        index_before_denial = distribution_service.distribution_stats.round_robin_index
+
+        assert await distribution_service.select_provider() is None
+        assert distribution_service.distribution_stats.round_robin_index == index_before_denial
+
+        second = await distribution_service.select_provider()
+        assert (first[0], second[0]) == ("provider1", "provider2")
+
     @pytest.mark.asyncio
     async def test_select_provider_no_healthy_providers(self, distribution_service, mock_health_tracker):
         """Test selecting provider when no providers are healthy."""
-        mock_health_tracker.get_health_status.side_effect = [
+        mock_health_tracker.statuses = [
             {"is_healthy": False, "failure_rate": 0.8},
             {"is_healthy": False, "failure_rate": 0.9},
             {"is_healthy": False, "failure_rate": 0.7}
@@ -395,7 +518,7 @@ class TestProviderSelectionIntegration:
     @pytest.mark.asyncio
     async def test_select_provider_health_tracker_error(self, distribution_service, mock_health_tracker):
         """Test selecting provider when health tracker throws error."""
-        mock_health_tracker.get_health_status.side_effect = Exception("Health tracker error")
+        mock_health_tracker.statuses = Exception("Health tracker error")
 
         result = await distribution_service.select_provider()
 
@@ -408,12 +531,74 @@ class TestProviderSelectionIntegration:
     @pytest.mark.asyncio
     async def test_select_provider_rate_limiter_error(self, distribution_service, mock_rate_limiter):
         """Test selecting provider when rate limiter throws error."""
-        mock_rate_limiter.is_allowed.side_effect = Exception("Rate limiter error")
+        mock_rate_limiter.results = Exception("Rate limiter error")
 
         result = await distribution_service.select_provider()
 
         assert result is None  # Should not select on rate limiter error
 
+    @pytest.mark.asyncio
+    async def test_rate_limiter_circuit_breaker(self, mock_health_tracker, mock_global_rate_limiter, provider_urls):
+        """Test Redis outages behind the real RateLimiter open the circuit, with a half-open probe."""
+        redis = AsyncMock()
+        redis.eval.side_effect = ConnectionError("Connection refused")
+        service = SMSDistributionService(
+            health_tracker=mock_health_tracker,
+            rate_limiter=RateLimiter(redis, rate_limit=50, window=1),
+            global_rate_limiter=mock_global_rate_limiter,
+            provider_urls=provider_urls
+        )
+        threshold = SMSDistributionService.RATE_LIMITER_FAILURE_THRESHOLD
+        clock = [1000.0]
+
+        with patch("src.distribution.time") as mock_time:
+            mock_time.monotonic.side_effect = lambda: clock[0]
+
+            # Each selection's refresh stops at the first provider's failed check
+            for _ in range(threshold):
+                assert await service.select_provider() is None
+            assert redis.eval.await_count == threshold
+
+            # Circuit is open: rejected locally without touching Redis
+            assert await service.select_provider() is None
+            assert redis.eval.await_count == threshold
+
+            # After the cooldown one probe runs; its failure reopens the circuit at once
+            clock[0] += SMSDistributionService.RATE_LIMITER_COOLDOWN_SECONDS
+            assert await service.select_provider() is None
+            assert redis.eval.await_count == threshold + 1
+            assert await service.select_provider() is None
+            assert redis.eval.await_count == threshold + 1
+
+            # A successful probe closes the circuit and clears the failure count
+            clock[0] += SMSDistributionService.RATE_LIMITER_COOLDOWN_SECONDS
+            redis.eval.side_effect = None
+            redis.eval.return_value = 1
+            assert await service.select_provider() is not None
+
+            redis.eval.side_effect = ConnectionError("Connection refused")
+            assert await service.select_provider() is None
+            redis.eval.side_effect = None
+            assert await service.select_provider() is not None
+
+    @pytest.mark.asyncio
+    async def test_last_used_single_snapshot(self, distribution_service):
+        """Test one select call reads the monotonic clock once and stamps last_used with wall-clock time."""
+        ticks = iter(range(1000, 2000))
+
+        # Patch the module reference only so the event loop clock is untouched
+        with patch("src.distribution.time") as mock_time:
+            mock_time.monotonic.side_effect = lambda: float(next(ticks))
+            mock_time.time.return_value = 1_700_000_000.0
+            result = await distribution_service.select_provider()
+
+        assert result is not None
+        provider_id, _ = result
+        assert mock_time.monotonic.call_count == 1
+        assert distribution_service.provider_status[provider_id].last_used == 1_700_000_000.0
+        assert distribution_service.get_distribution_stats()["provider_status"][provider_id]["last_used"] == 1_700_000_000.0
+        assert distribution_service.last_health_update == 1000.0
+
 
 class TestDistributionStats:
     """Test cases for distribution statistics."""
@@ -477,6 +662,23 @@ class TestDistributionStats:
         }
         assert distribution_service.provider_usage_count == {}
 
+    @pytest.mark.asyncio
+    async def test_reset_state(self, distribution_service):
+        """Test resetting the service to its freshly constructed state."""
+        distribution_service.distribution_stats.total_requests = 10
+        distribution_service.provider_status["provider1"].is_healthy = False
+        distribution_service.last_health_update = time.monotonic()
+        distribution_service._rate_limiter_failures = 2
+        distribution_service._rate_limiter_circuit_open_until = time.monotonic() + 60
+
+        await distribution_service.reset_state()
+
+        assert distribution_service.distribution_stats.total_requests == 0
+        assert distribution_service.provider_status["provider1"].is_healthy is True
+        assert distribution_service.last_health_update == 0.0
+        assert distribution_service._rate_limiter_failures == 0
+        assert distribution_service._rate_limiter_circuit_open_until == 0.0
+
 
 class TestDistributionScenarios:
     """Test cases for various distribution scenarios."""
@@ -503,9 +705,9 @@ class TestDistributionScenarios:
         def is_allowed(provider_id):
             return rate_limit_responses[provider_id]
 
-        mock_health_tracker.get_health_status.side_effect = get_health_status
-        mock_rate_limiter.is_allowed.side_effect = is_allowed
-        mock_global_rate_limiter.is_allowed.return_value = (True, 5)
+        mock_health_tracker.statuses = get_health_status
+        mock_rate_limiter.results = is_allowed
+        mock_global_rate_limiter.results = (True, 5)
 
         result = await distribution_service.select_provider()
 
@@ -541,9 +743,9 @@ class TestDistributionScenarios:
         def is_allowed(provider_id):
             return rate_limit_responses[provider_id]
 
-        mock_health_tracker.get_health_status.side_effect = get_health_status
-        mock_rate_limiter.is_allowed.side_effect = is_allowed
-        mock_global_rate_limiter.is_allowed.return_value = (True, 5)
+        mock_health_tracker.statuses = get_health_status
+        mock_rate_limiter.results = is_allowed
+        mock_global_rate_limiter.results = (True, 5)
 
         # First selection should be from healthy providers (1 or 3)
         result1 = await distribution_service.select_provider()
@@ -552,13 +754,13 @@ class TestDistributionScenarios:
         assert provider_id1 in ["provider1", "provider3"]
 
         # Provider2 becomes healthy
-        mock_health_tracker.get_health_status.side_effect = [
+        mock_health_tracker.statuses = [
             {"is_healthy": True, "failure_rate": 0.2},   # provider1
             {"is_healthy": True, "failure_rate": 0.3},   # provider2 (now healthy)
             {"is_healthy": True, "failure_rate": 0.1}   # provider3
         ]
 
-        mock_rate_limiter.is_allowed.side_effect = [(True, 10), (True, 15), (True, 5)]
+        mock_rate_limiter.results = [(True, 10), (True, 15), (True, 5)]
 
         # Next selection should include provider2 in the rotation
         result2 = await distribution_service.select_provider()
@@ -580,13 +782,13 @@ class TestDistributionScenarios:
                 return {"is_healthy": True, "failure_rate": 0.0, "failure_count": 0}
             return {"is_healthy": True, "failure_rate": 0.0, "failure_count": 0}
 
-        mock_health_tracker.get_health_status.side_effect = health_status_side_effect
+        mock_health_tracker.statuses = health_status_side_effect
 
         def rate_limit_side_effect(provider_id):
             return (True, 10)  # All providers allowed
 
-        mock_rate_limiter.is_allowed.side_effect = rate_limit_side_effect
-        mock_global_rate_limiter.is_allowed.return_value = (True, 50)
+        mock_rate_limiter.results = rate_limit_side_effect
+        mock_global_rate_limiter.results = (True, 50)
 
         selected_providers = []
 
@@ -609,6 +811,97 @@ class TestDistributionScenarios:
         assert distribution_service.distribution_stats.requests_per_provider["provider2"] == 3
         assert distribution_service.distribution_stats.requests_per_provider["provider3"] == 3
 
+    @pytest.mark.asyncio
+    async def test_select_providers_batch(self, distribution_service, mock_health_tracker, mock_rate_limiter):
+        """Test batch selection refreshes status once and spreads requests evenly."""
+        mock_health_tracker.statuses = {"is_healthy": True, "failure_rate": 0.0, "failure_count": 0}
+        mock_rate_limiter.results = (True, 10)
+
+        selections = await distribution_service.select_providers_batch(9)
+
+        assert len(selections) == 9
+        selected_providers = [provider_id for provider_id, _ in selections]
+        assert selected_providers.count("provider1") == 3
+        assert selected_providers.count("provider2") == 3
+        assert selected_providers.count("provider3") == 3
+        for provider_id, provider_url in selections:
+            assert provider_url == distribution_service.provider_urls[provider_id]
+
+        # One health refresh (one probe per provider) plus the weighted-distribution check
+        assert mock_health_tracker.calls == 6
+        assert mock_rate_limiter.calls == 3
+        assert distribution_service.distribution_stats.total_requests == 9
+        assert distribution_service.distribution_stats.requests_per_provider == {
+            "provider1": 3, "provider2": 3, "provider3": 3
+        }
+
+    @pytest.mark.asyncio
+    async def test_select_providers_batch_drops_limited_provider(self, distribution_service, mock_rate_limiter):
+        """Test batch selection drops picks for a provider granted no reserved slots."""
+        mock_rate_limiter.reserve_results = lambda provider_id, requested: (
+            0 if provider_id == "provider2" else requested
+        )
+
+        selections = await distribution_service.select_providers_batch(6)
+
+        assert [provider_id for provider_id, _ in selections] == [
+            "provider1", "provider3", "provider1", "provider3"
+        ]
+
+    @pytest.mark.asyncio
+    async def test_select_providers_batch_truncated_at_limits(self, mock_health_tracker, provider_urls):
+        """Test a batch larger than the rate limits is cut to the slots the limits grant."""
+        redis = FakeAsyncRedis()
+        service = SMSDistributionService(
+            health_tracker=mock_health_tracker,
+            rate_limiter=RateLimiter(redis, rate_limit=50, window=1),
+            global_rate_limiter=GlobalRateLimiter(redis, rate_limit=200, window=1),
+            provider_urls=provider_urls
+        )
+
+        selections = await service.select_providers_batch(1000)
+
+        # The status refresh counts one request per provider, leaving 49 slots each
+        selected_providers = [provider_id for provider_id, _ in selections]
+        assert len(selected_providers) == 147
+        assert {provider_id: selected_providers.count(provider_id) for provider_id in provider_urls} == {
+            "provider1": 49, "provider2": 49, "provider3": 49
+        }
+        assert {key: redis.data[key] for key in redis.data if key.startswith("rate_limit:")} == {
+            "rate_limit:provider1": 50, "rate_limit:provider2": 50, "rate_limit:provider3": 50
+        }
+        assert redis.data["global_rate_limit"] == 147
+
+        # A second batch in the same window gets nothing
+        assert await service.select_providers_batch(10) == []
+
+    @pytest.mark.asyncio
+    async def test_select_providers_batch_truncated_at_global_limit(self, mock_health_tracker, provider_urls):
+        """Test the global limit caps a batch the provider limits would allow."""
+        redis = FakeAsyncRedis()
+        service = SMSDistributionService(
+            health_tracker=mock_health_tracker,
+            rate_limiter=RateLimiter(redis, rate_limit=50, window=1),
+            global_rate_limiter=GlobalRateLimiter(redis, rate_limit=30, window=1),
+            provider_urls=provider_urls
+        )
+
+        selections = await service.select_providers_batch(100)
+
+        assert len(selections) == 30
+        assert redis.data["global_rate_limit"] == 30
+
+    @pytest.mark.asyncio
+    async def test_select_providers_batch_weighted_reads_health_once(self, distribution_service, mock_health_tracker):
+        """Test weighted batch selection reads each provider's health once, not once per pick."""
+        mock_health_tracker.statuses = {"is_healthy": True, "failure_rate": 0.2, "failure_count": 2}
+
+        selections = await distribution_service.select_providers_batch(30)
+
+        assert len(selections) == 30
+        # Health refresh, weighted-distribution check (stops at the first failing provider), weights
+        assert mock_health_tracker.calls == 3 + 1 + 3
+
     @pytest.mark.asyncio
     async def test_partial_outage_scenario(self, distribution_service, mock_health_tracker, mock_rate_limiter, mock_global_rate_limiter):
         """Test distribution during partial provider outage."""
@@ -637,9 +930,9 @@ class TestDistributionScenarios:
         def is_allowed(provider_id):
             return rate_limit_responses[provider_id]
 
-        mock_health_tracker.get_health_status.side_effect = get_health_status
-        mock_rate_limiter.is_allowed.side_effect = is_allowed
-        mock_global_rate_limiter.is_allowed.return_value = (True, 10)
+        mock_health_tracker.statuses = get_health_status
+        mock_rate_limiter.results = is_allowed
+        mock_global_rate_limiter.results = (True, 10)
 
         # Set health check interval to 0 to force immediate updates
         distribution_service.health_check_interval = 0
@@ -703,9 +996,9 @@ class TestDistributionScenarios:
         def get_health_status(provider_id):
             return health_responses[provider_id]
 
-        mock_health_tracker.get_health_status.side_effect = get_health_status
-        mock_rate_limiter.is_allowed.return_value = (True, 10)
-        mock_global_rate_limiter.is_allowed.return_value = (True, 10)
+        mock_health_tracker.statuses = get_health_status
+        mock_rate_limiter.results = (True, 10)
+        mock_global_rate_limiter.results = (True, 10)
 
         selected_providers = []
         for _ in range(10):
@@ -726,9 +1019,9 @@ class TestDistributionScenarios:
     @pytest.mark.asyncio
     async def test_all_providers_unhealthy_scenario(self, distribution_service, mock_health_tracker, mock_rate_limiter, mock_global_rate_limiter):
         """Test that no provider is selected when all are unhealthy."""
-        mock_health_tracker.get_health_status.return_value = {"is_healthy": False, "failure_rate": 0.9}
-        mock_rate_limiter.is_allowed.return_value = (True, 10)
-        mock_global_rate_limiter.is_allowed.return_value = (True, 10)
+        mock_health_tracker.statuses = {"is_healthy": False, "failure_rate": 0.9}
+        mock_rate_limiter.results = (True, 10)
+        mock_global_rate_limiter.results = (True, 10)
 
         result = await distribution_service.select_provider()
 
@@ -760,7 +1053,7 @@ class TestErrorHandling:
     @pytest.mark.asyncio
     async def test_select_provider_unexpected_error(self, distribution_service, mock_health_tracker):
         """Test selecting provider with unexpected error."""
-        mock_health_tracker.get_health_status.side_effect = Exception("Unexpected error")
+        mock_health_tracker.statuses = Exception("Unexpected error")
 
         result = await distribution_service.select_provider()
 
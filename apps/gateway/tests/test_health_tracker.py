@@ -5,38 +5,103 @@ Tests sliding window calculations, failure rate tracking, and health status dete
 """
 
 import asyncio
+import math
 import time
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from redis.asyncio import Redis
+from redis.asyncio import ConnectionPool, Redis
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 
-from src.health_tracker import ProviderHealthTracker, create_health_tracker
+import src.health_tracker as health_tracker_module
+from src.health_tracker import ProviderHealthTracker, create_health_tracker, get_connection_pool
+from tests.fake_async_redis import FakeAsyncRedis
 
 
-@pytest.fixture
+# Redis attribute names, computed once: AsyncMock(spec=Redis) re-inspects every member of the
+# class on each call to find coroutine methods, which dominated per-test fixture setup here.
+_REDIS_ATTRIBUTES = dir(Redis)
+
+# Default frozen clock and the 5 minute windows it falls in
+FROZEN_TIME = 1000.0
+WINDOW_DURATION = 300
+CURRENT_WINDOW = int(FROZEN_TIME // WINDOW_DURATION) * WINDOW_DURATION  # 900
+PREV_WINDOW = CURRENT_WINDOW - WINDOW_DURATION  # 600
+
+
+@pytest.fixture(autouse=True)
+def frozen_time(request, monkeypatch):
+    """Freeze the health tracker's wall clock; override with @pytest.mark.frozen_time(t)."""
+    marker = request.node.get_closest_marker("frozen_time")
+    clock = MagicMock(return_value=marker.args[0] if marker else FROZEN_TIME)
+    monkeypatch.setattr(health_tracker_module.time, "time", clock)
+    return clock
+
+
+def apply_redis_defaults(redis):
+    """Configure the default responses of the mocked Redis commands."""
+    redis.incr.return_value = 1
+    redis.expire.return_value = True
+    redis.get.return_value = "1"  # Return string instead of bytes to match actual Redis response handling
+    redis.hmget.return_value = ["1", "1", "1", "1"]
+    redis.unlink.return_value = True
+    # Pipeline used for HINCRBY+EXPIRE flushes and multi-provider HMGET reads
+    pipe = redis.pipeline.return_value.__aenter__.return_value
+    pipe.execute = AsyncMock(return_value=[1, True])
+
+
+@pytest.fixture(scope="module")
 def mock_redis():
-    """Create mock Redis client."""
-    redis = AsyncMock(spec=Redis)
-    # Configure return values for async methods
-    redis.incr = AsyncMock(return_value=1)
-    redis.expire = AsyncMock(return_value=True)
-    redis.get = AsyncMock(return_value="1")  # Return string instead of bytes to match actual Redis response handling
-    redis.delete = AsyncMock(return_value=True)
+    """Create mock Redis client, shared by the module and reset before each test."""
+    redis = AsyncMock(spec=_REDIS_ATTRIBUTES)
+    # Spec'd children default to MagicMock; the commands the tracker awaits must be AsyncMock
+    for command in ("incr", "expire", "get", "hmget", "unlink"):
+        setattr(redis, command, AsyncMock())
+    redis.pipeline = MagicMock()
+    apply_redis_defaults(redis)
     return redis
 
 
-@pytest.fixture
+def serve_hash_fields(mock_redis, hashes):
+    """Answer HMGETs from a {key: {field: value}} table, independent of field order."""
+    mock_redis.hmget.side_effect = lambda key, *fields: [hashes.get(key, {}).get(field) for field in fields]
+
+
+@pytest.fixture(scope="module")
 def health_tracker(mock_redis):
-    """Create ProviderHealthTracker instance for testing."""
+    """Create ProviderHealthTracker instance, shared by the module and reset before each test."""
     return ProviderHealthTracker(
         redis_client=mock_redis,
-        window_duration=300,  # 5 minutes
+        window_duration=WINDOW_DURATION,
         failure_threshold=0.7  # 70%
     )
 
 
+@pytest.fixture(autouse=True)
+def reset_shared_fixtures(mock_redis, health_tracker):
+    """Restore the shared Redis mock and clear tracker state left by the previous test."""
+    mock_redis.reset_mock(return_value=True, side_effect=True)
+    apply_redis_defaults(mock_redis)
+    health_tracker.reset_local_state()
+
+
+@pytest.fixture
+def patched_tracker(health_tracker, request, monkeypatch):
+    """Tracker whose get_health_status answers from the {provider_id: status} table in request.param.
+
+    Exception values are raised instead of returned.
+    """
+    responses = request.param
+
+    def get_health_status(provider_id):
+        response = responses[provider_id]
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    monkeypatch.setattr(health_tracker, "get_health_status", AsyncMock(side_effect=get_health_status))
+    return health_tracker
+
 class TestProviderHealthTracker:
     """Test cases for ProviderHealthTracker class."""
 
@@ -46,232 +111,291 @@ class TestProviderHealthTracker:
         assert health_tracker.window_duration == 300
         assert health_tracker.failure_threshold == 0.7
 
-    def test_get_window_key_format(self, health_tracker):
-        """Test Redis key generation for health metrics."""
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            success_key = health_tracker._get_window_key("provider1", "success")
-            failure_key = health_tracker._get_window_key("provider1", "failure")
-
-            expected_window = int(1000.0 // 300) * 300  # 900
-            assert success_key == f"health:provider1:success:{expected_window}"
-            assert failure_key == f"health:provider1:failure:{expected_window}"
+    def test_get_window_field_format(self, health_tracker):
+        """Test hash field generation for health metrics."""
+        success_field = health_tracker._get_window_field("success")
+        failure_field = health_tracker._get_window_field("failure")
 
-    def test_get_current_window_keys(self, health_tracker):
-        """Test getting current and previous window keys."""
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            current_success, current_failure, prev_success, prev_failure = health_tracker._get_current_window_keys("provider1")
+        assert success_field == f"s:{CURRENT_WINDOW}"
+        assert failure_field == f"f:{CURRENT_WINDOW}"
 
-            current_window = 900  # int(1000 // 300) * 300
-            prev_window = current_window - 300
+    def test_power_of_two_window_uses_bitmask(self, mock_redis):
+        """Test that power-of-two windows use the bitmask and match the division result."""
+        tracker = ProviderHealthTracker(redis_client=mock_redis, window_duration=256)
 
-            assert current_success == f"health:provider1:success:{current_window}"
-            assert current_failure == f"health:provider1:failure:{current_window}"
-            assert prev_success == f"health:provider1:success:{prev_window}"
-            assert prev_failure == f"health:provider1:failure:{prev_window}"
-
-    def test_calculate_sliding_window_metrics_all_current_window(self, health_tracker):
-        """Test sliding window calculation with all metrics in current window."""
-        total_success, total_failure, failure_rate = health_tracker._calculate_sliding_window_metrics(
-            current_success=10, current_failure=5, prev_success=0, prev_failure=0
-        )
+        assert tracker._window_start == tracker._masked_window_start
+        for now in (0.0, 255.9, 256.0, 1000.5, 1_700_000_123.25):
+            assert tracker._window_start(now) == tracker._divided_window_start(now)
 
-        assert total_success == 10
-        assert total_failure == 5
-        assert failure_rate == 5 / 15  # 0.333
+    def test_non_power_of_two_window_uses_division(self, health_tracker):
+        """Test that other window durations fall back to floor division."""
+        assert health_tracker._window_start == health_tracker._divided_window_start
+        assert health_tracker._window_start(1000.0) == 900
 
-    def test_calculate_sliding_window_metrics_with_previous_window(self, health_tracker):
-        """Test sliding window calculation with metrics in both windows."""
-        # Simulate being 50% through the current window (150 seconds into 300-second window)
-        with patch('src.health_tracker.time.time', return_value=1050.0):
-            total_success, total_failure, failure_rate = health_tracker._calculate_sliding_window_metrics(
-                current_success=8, current_failure=2, prev_success=10, prev_failure=10
-            )
+    def test_provider_key_is_cached_per_provider(self, health_tracker):
+        """Test that provider hash keys are built once and reused."""
+        provider_key = health_tracker._get_provider_key("provider1")
 
-            # Should weight previous window at 50% (1.0 - 0.5)
-            expected_prev_success = 10 * 0.5  # 5
-            expected_prev_failure = 10 * 0.5  # 5
+        assert provider_key == "health:provider1"
+        assert health_tracker._get_provider_key("provider1") is provider_key
 
-            assert total_success == 8 + expected_prev_success
-            assert total_failure == 2 + expected_prev_failure
-            assert failure_rate == (7 / 20)  # (2+5) / (8+2+5+5)
+    def test_get_current_window_fields(self, health_tracker):
+        """Test getting current and previous window fields."""
+        current_success, current_failure, prev_success, prev_failure = (
+            health_tracker._get_current_window_fields()
+        )
 
-    def test_calculate_sliding_window_metrics_no_requests(self, health_tracker):
-        """Test sliding window calculation with no requests."""
+        assert current_success == f"s:{CURRENT_WINDOW}"
+        assert current_failure == f"f:{CURRENT_WINDOW}"
+        assert prev_success == f"s:{PREV_WINDOW}"
+        assert prev_failure == f"f:{PREV_WINDOW}"
+
+    @pytest.mark.parametrize(
+        "current_success,current_failure,prev_success,prev_failure,"
+        "expected_success,expected_failure,expected_rate",
+        [
+            # All metrics in the current window
+            pytest.param(10, 5, 0, 0, 10, 5, 5 / 15, id="all_current_window"),
+            # 50% through the window: previous window weighted at 0.5
+            pytest.param(8, 2, 10, 10, 13, 7, 7 / 20, id="with_previous_window",
+                         marks=pytest.mark.frozen_time(1050.0)),
+            pytest.param(0, 0, 0, 0, 0, 0, 0.0, id="no_requests"),
+            # Start of the window: previous window at full weight
+            pytest.param(2, 8, 1, 9, 3, 17, 17 / 20, id="high_failure_rate",
+                         marks=pytest.mark.frozen_time(900.0)),
+        ],
+    )
+    def test_calculate_sliding_window_metrics(
+        self, health_tracker, current_success, current_failure, prev_success, prev_failure,
+        expected_success, expected_failure, expected_rate
+    ):
+        """Test sliding window totals and failure rate across window positions."""
         total_success, total_failure, failure_rate = health_tracker._calculate_sliding_window_metrics(
-            current_success=0, current_failure=0, prev_success=0, prev_failure=0
+            current_success=current_success, current_failure=current_failure,
+            prev_success=prev_success, prev_failure=prev_failure
         )
 
-        assert total_success == 0
-        assert total_failure == 0
-        assert failure_rate == 0.0
-
-    def test_calculate_sliding_window_metrics_high_failure_rate(self, health_tracker):
-        """Test sliding window calculation with high failure rate."""
-        with patch('src.health_tracker.time.time', return_value=900.0):  # Start of window
-            # At the start of the window, fraction_into_window = 0
-            # So previous_weight = 1.0 - 0 = 1.0 (full weight)
-            # total_success = current + prev * weight = 2 + 1*1.0 = 3
-            # total_failure = current + prev * weight = 8 + 9*1.0 = 17
-            # failure_rate = 17 / (3 + 17) = 17/20 = 0.85
-            total_success, total_failure, failure_rate = health_tracker._calculate_sliding_window_metrics(
-                current_success=2, current_failure=8, prev_success=1, prev_failure=9
-            )
-
-            # With time = start of window, previous_weight = 1.0
-            assert total_success == 3  # 2 + 1*1.0
-            assert total_failure == 17  # 8 + 9*1.0
-            assert failure_rate == 0.85  # 17/20
+        assert math.isclose(total_success, expected_success)
+        assert math.isclose(total_failure, expected_failure)
+        assert math.isclose(failure_rate, expected_rate)
 
     @pytest.mark.asyncio
     async def test_record_success(self, health_tracker, mock_redis):
         """Test recording a successful SMS send."""
-        # Configure async mocks for this specific test
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+
+        result = await health_tracker.record_success("provider1")
 
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            result = await health_tracker.record_success("provider1")
+        assert result is True
 
-            assert result is True
-            # Verify the correct Redis key and window was used
-            current_window = int(1000.0 // 300) * 300  # 900
-            expected_key = f"health:provider1:success:{current_window}"
-            mock_redis.incr.assert_called_once_with(expected_key)
-            mock_redis.expire.assert_called_once_with(expected_key, 300)
+        # Verify the correct Redis key and window was used in one MULTI/EXEC round-trip
+        expected_key = "health:provider1"
+        mock_redis.pipeline.assert_called_once_with(transaction=True)
+        pipe.hincrby.assert_called_once_with(expected_key, f"s:{CURRENT_WINDOW}", 1)
+        # Windows older than the previous one are pruned from the hash
+        pipe.hdel.assert_called_once_with(expected_key, "s:300", "f:300", "s:0", "f:0")
+        pipe.expire.assert_called_once_with(expected_key, 600)
+        pipe.execute.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_record_failure(self, health_tracker, mock_redis):
         """Test recording a failed SMS send."""
-        # Configure async mocks for this specific test
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+
+        result = await health_tracker.record_failure("provider1")
 
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            result = await health_tracker.record_failure("provider1")
+        assert result is True
 
-            assert result is True
-            # Verify the correct Redis key and window was used
-            current_window = int(1000.0 // 300) * 300  # 900
-            expected_key = f"health:provider1:failure:{current_window}"
-            mock_redis.incr.assert_called_once_with(expected_key)
-            mock_redis.expire.assert_called_once_with(expected_key, 300)
+        # Verify the correct Redis key and window was used in one MULTI/EXEC round-trip
+        expected_key = "health:provider1"
+        mock_redis.pipeline.assert_called_once_with(transaction=True)
+        pipe.hincrby.assert_called_once_with(expected_key, f"f:{CURRENT_WINDOW}", 1)
+        pipe.expire.assert_called_once_with(expected_key, 600)
+        pipe.execute.assert_awaited_once()
 
     @pytest.mark.asyncio
     async def test_record_success_redis_connection_error(self, health_tracker, mock_redis):
         """Test recording success with Redis connection error."""
-        mock_redis.incr.side_effect = ConnectionError("Connection failed")
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        pipe.execute.side_effect = ConnectionError("Connection failed")
 
         result = await health_tracker.record_success("provider1")
 
         assert result is False
-        mock_redis.incr.assert_called_once()
+        pipe.execute.assert_awaited_once()
+        # Delta is kept for the next flush
+        assert sum(health_tracker._pending.values()) == 1
 
     @pytest.mark.asyncio
     async def test_record_failure_redis_timeout_error(self, health_tracker, mock_redis):
         """Test recording failure with Redis timeout error."""
-        mock_redis.incr.side_effect = TimeoutError("Timeout")
+        mock_redis.pipeline.return_value.__aenter__.return_value.execute.side_effect = TimeoutError("Timeout")
 
         result = await health_tracker.record_failure("provider1")
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_record_retries_failed_deltas_in_one_flush(self, health_tracker, mock_redis):
+        """Test that deltas kept from failed flushes are written as one HINCRBY per window field."""
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        pipe.execute.side_effect = [ConnectionError("Connection failed")] * 4 + [[]]
+
+        for _ in range(3):
+            assert await health_tracker.record_success("provider1") is False
+        assert await health_tracker.record_failure("provider1") is False
+        assert await health_tracker.record_failure("provider1") is True
+
+        assert pipe.hincrby.call_args_list[-2:] == [
+            (("health:provider1", "s:900", 3),),
+            (("health:provider1", "f:900", 2),),
+        ]
+        assert pipe.execute.await_count == 5
+        assert not health_tracker._pending
+
+    @pytest.mark.asyncio
+    async def test_recorded_outcomes_visible_to_another_tracker(self):
+        """Test that outcomes reach Redis before record_* returns, so a new tracker sees them."""
+        redis = FakeAsyncRedis()
+        recorder = ProviderHealthTracker(redis, window_duration=WINDOW_DURATION, failure_threshold=0.7)
+
+        for _ in range(10):
+            assert await recorder.record_failure("provider1") is True
+
+        reader = ProviderHealthTracker(redis, window_duration=WINDOW_DURATION, failure_threshold=0.7)
+        health_status = await reader.get_health_status("provider1")
+
+        assert health_status["failure_count"] == 10
+        assert health_status["is_healthy"] is False
+
     @pytest.mark.asyncio
     async def test_get_health_status_healthy_provider(self, health_tracker, mock_redis):
         """Test getting health status for a healthy provider."""
-        current_time = 1000.0
-        current_window = int(current_time // 300) * 300  # 900
-        prev_window = current_window - 300  # 600
-
         # Mock Redis responses for current window (8 success, 2 failures = 20% failure rate)
-        mock_redis.get.side_effect = [
-            "8",  # current success
-            "2",  # current failure
-            "5",  # previous success
-            "1",  # previous failure
-        ]
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {
+                f"s:{CURRENT_WINDOW}": b"8",
+                f"f:{CURRENT_WINDOW}": b"2",
+                f"s:{PREV_WINDOW}": b"5",
+                f"f:{PREV_WINDOW}": b"1",
+            }
+        })
+
+        status = await health_tracker.get_health_status("provider1")
+
+        # All four window fields come from the provider hash in one HMGET
+        mock_redis.hmget.assert_awaited_once()
+        mock_redis.pipeline.assert_not_called()
+
+        # Verify status calculation
+        assert status["provider_id"] == "provider1"
+        assert status["is_healthy"] is True  # 20% < 70% threshold
+        # For this test, with time at 1000.0 in 300-sec window:
+        # current_window_start = int(1000//300)*300 = 900
+        # fraction_into_window = (1000-900)/300 = 0.333
+        # previous_weight = 1.0 - 0.333 = 0.667
+        # weighted_prev_success = int(5 * 0.667) = 3
+        # weighted_prev_failure = int(1 * 0.667) = 0
+        # success = 8 + 3 = 11, failure = 2 + 0 = 2
+        # total_requests = 11 + 2 = 13, failure_rate = 2/13 = ~0.154
+        assert status["total_requests"] == 13
+        assert status["success_count"] == 11
+        assert status["failure_count"] == 2
+        assert status["failure_rate"] == pytest.approx((2/13), abs=0.01)  # ~15.4%
+
+    @pytest.mark.asyncio
+    async def test_get_health_status_reads_clock_once(self, health_tracker, mock_redis, frozen_time):
+        """Test that get_health_status threads a single time.time() reading through."""
+        mock_redis.hmget.return_value = ["8", "2", "5", "1"]
+
+        status = await health_tracker.get_health_status("provider1")
 
-        with patch('src.health_tracker.time.time', return_value=current_time):
-            status = await health_tracker.get_health_status("provider1")
-
-            # Verify Redis calls
-            expected_calls = [
-                f"health:provider1:success:{current_window}",
-                f"health:provider1:failure:{current_window}",
-                f"health:provider1:success:{prev_window}",
-                f"health:provider1:failure:{prev_window}",
-            ]
-            for call in mock_redis.get.call_args_list:
-                assert call[0][0] in expected_calls
-
-            # Verify status calculation
-            assert status["provider_id"] == "provider1"
-            assert status["is_healthy"] is True  # 20% < 70% threshold
-            # For this test, with time at 1000.0 in 300-sec window:
-            # current_window_start = int(1000//300)*300 = 900
-            # fraction_into_window = (1000-900)/300 = 0.333
-            # previous_weight = 1.0 - 0.333 = 0.667
-            # weighted_prev_success = int(5 * 0.667) = 3
-            # weighted_prev_failure = int(1 * 0.667) = 0
-            # success = 8 + 3 = 11, failure = 2 + 0 = 2
-            # total_requests = 11 + 2 = 13, failure_rate = 2/13 = ~0.154
-            assert status["total_requests"] == 13
-            assert status["success_count"] == 11
-            assert status["failure_count"] == 2
-            assert abs(status["failure_rate"] - (2/13)) < 0.01  # ~15.4%
+        assert frozen_time.call_count == 1
+        assert status["timestamp"] == 1000.0
+        assert status["current_window"]["expires_at"] == 1200
+
+    @pytest.mark.asyncio
+    @pytest.mark.frozen_time(900.0)
+    async def test_get_health_status_parses_raw_bytes(self, health_tracker, mock_redis):
+        """Test that raw bytes responses (decode_responses=False) are parsed directly."""
+        mock_redis.hmget.return_value = [b"8", b"2", b"bad", None]
+
+        status = await health_tracker.get_health_status("provider1")
+
+        assert status["current_window"] == {"success": 8, "failure": 2, "expires_at": 1200}
+        assert status["previous_window"] == {"success": 0, "failure": 0}
+
+    @pytest.mark.asyncio
+    async def test_get_health_status_coalesces_concurrent_calls(self, health_tracker, mock_redis):
+        """Test that concurrent get_health_status calls for a provider share one fetch."""
+        async def slow_hmget(key, *fields):
+            await asyncio.sleep(0)
+            return ["8", "2", "5", "1"]
+
+        mock_redis.hmget.side_effect = slow_hmget
+
+        first, second = await asyncio.gather(
+            health_tracker.get_health_status("provider1"),
+            health_tracker.get_health_status("provider1"),
+        )
+
+        assert first == second
+        assert mock_redis.hmget.await_count == 1
+        assert not health_tracker._inflight
+
+        # A later call starts a fresh fetch
+        await health_tracker.get_health_status("provider1")
+        assert mock_redis.hmget.await_count == 2
 
     @pytest.mark.asyncio
     async def test_get_health_status_unhealthy_provider(self, health_tracker, mock_redis):
         """Test getting health status for an unhealthy provider."""
-        current_time = 1000.0
-        current_window = int(current_time // 300) * 300  # 900
-        prev_window = current_window - 300  # 600
-
         # Mock Redis responses for current window (2 success, 8 failures = 80% failure rate)
-        mock_redis.get.side_effect = [
-            "2",  # current success
-            "8",  # current failure
-            "1",  # previous success
-            "4",  # previous failure
-        ]
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {
+                f"s:{CURRENT_WINDOW}": b"2",
+                f"f:{CURRENT_WINDOW}": b"8",
+                f"s:{PREV_WINDOW}": b"1",
+                f"f:{PREV_WINDOW}": b"4",
+            }
+        })
+
+        status = await health_tracker.get_health_status("provider1")
 
-        with patch('src.health_tracker.time.time', return_value=current_time):
-            status = await health_tracker.get_health_status("provider1")
-
-            assert status["provider_id"] == "provider1"
-            assert status["is_healthy"] is False  # 80% > 70% threshold
-            # For this test, with time at 1000.0 in 300-sec window:
-            # current_window_start = int(1000//300)*300 = 900
-            # fraction_into_window = (1000-900)/300 = 0.333
-            # previous_weight = 1.0 - 0.333 = 0.667
-            # weighted_prev_success = int(1 * 0.667) = 0
-            # weighted_prev_failure = int(4 * 0.667) = 2
-            # success = 2 + 0 = 2, failure = 8 + 2 = 10
-            # total_requests = 2 + 10 = 12, failure_rate = 10/12 = ~0.833
-            assert status["total_requests"] == 12
-            assert status["success_count"] == 2
-            assert status["failure_count"] == 10
-            assert abs(status["failure_rate"] - (10/12)) < 0.01  # ~83.3%
+        assert status["provider_id"] == "provider1"
+        assert status["is_healthy"] is False  # 80% > 70% threshold
+        # For this test, with time at 1000.0 in 300-sec window:
+        # current_window_start = int(1000//300)*300 = 900
+        # fraction_into_window = (1000-900)/300 = 0.333
+        # previous_weight = 1.0 - 0.333 = 0.667
+        # weighted_prev_success = int(1 * 0.667) = 0
+        # weighted_prev_failure = int(4 * 0.667) = 2
+        # success = 2 + 0 = 2, failure = 8 + 2 = 10
+        # total_requests = 2 + 10 = 12, failure_rate = 10/12 = ~0.833
+        assert status["total_requests"] == 12
+        assert status["success_count"] == 2
+        assert status["failure_count"] == 10
+        assert status["failure_rate"] == pytest.approx((10/12), abs=0.01)  # ~83.3%
 
     @pytest.mark.asyncio
     async def test_get_health_status_no_requests(self, health_tracker, mock_redis):
         """Test getting health status when no requests have been made."""
         # Mock Redis responses - no data
-        mock_redis.get.return_value = None
+        mock_redis.hmget.return_value = [None, None, None, None]
 
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            status = await health_tracker.get_health_status("provider1")
+        status = await health_tracker.get_health_status("provider1")
 
-            assert status["provider_id"] == "provider1"
-            assert status["is_healthy"] is True  # Default to healthy when no requests
-            assert status["total_requests"] == 0
-            assert status["success_count"] == 0
-            assert status["failure_count"] == 0
-            assert status["failure_rate"] == 0.0
+        assert status["provider_id"] == "provider1"
+        assert status["is_healthy"] is True  # Default to healthy when no requests
+        assert status["total_requests"] == 0
+        assert status["success_count"] == 0
+        assert status["failure_count"] == 0
+        assert status["failure_rate"] == 0.0
 
     @pytest.mark.asyncio
     async def test_get_health_status_redis_error(self, health_tracker, mock_redis):
         """Test getting health status with Redis error."""
-        mock_redis.get.side_effect = RedisError("Redis error")
+        mock_redis.hmget.side_effect = RedisError("Redis error")
 
         status = await health_tracker.get_health_status("provider1")
 
@@ -280,60 +404,90 @@ class TestProviderHealthTracker:
         assert status["is_healthy"] is True  # Default to healthy on error
         assert status["total_requests"] == 0
 
+    def test_error_health_status_copies_template(self, health_tracker):
+        """Test that error statuses are fresh copies of the prebuilt template."""
+        first = health_tracker._error_health_status("provider1", RedisError("down"))
+        second = health_tracker._error_health_status("provider2", RedisError("down"))
+
+        assert first is not second
+        assert first["provider_id"] == "provider1" and second["provider_id"] == "provider2"
+        assert first["error"] == "down"
+        assert health_tracker._error_status_template["provider_id"] is None
+        assert health_tracker._error_status_template["error"] is None
+
     @pytest.mark.asyncio
-    async def test_is_provider_healthy_healthy_provider(self, health_tracker, mock_redis):
-        """Test checking if healthy provider is healthy."""
-        # Mock healthy status response
-        healthy_status = {
-            "provider_id": "provider1",
-            "is_healthy": True,
-            "total_requests": 10,
-            "failure_rate": 0.2
-        }
-        health_tracker.get_health_status = AsyncMock(return_value=healthy_status)
-
-        result = await health_tracker.is_provider_healthy("provider1")
+    @pytest.mark.parametrize(
+        "patched_tracker,expected",
+        [
+            pytest.param(
+                {"provider1": {"provider_id": "provider1", "is_healthy": True, "total_requests": 10, "failure_rate": 0.2}},
+                True, id="healthy_provider"
+            ),
+            pytest.param(
+                {"provider1": {"provider_id": "provider1", "is_healthy": False, "total_requests": 10, "failure_rate": 0.8}},
+                False, id="unhealthy_provider"
+            ),
+            # Should default to healthy on error
+            pytest.param({"provider1": Exception("Unexpected error")}, True, id="error_fallback"),
+        ],
+        indirect=["patched_tracker"],
+    )
+    async def test_is_provider_healthy(self, patched_tracker, expected):
+        """Test is_provider_healthy against healthy, unhealthy and failing status lookups."""
+        result = await patched_tracker.is_provider_healthy("provider1")
 
-        assert result is True
+        assert result is expected
 
     @pytest.mark.asyncio
-    async def test_is_provider_healthy_unhealthy_provider(self, health_tracker, mock_redis):
-        """Test checking if unhealthy provider is unhealthy."""
-        # Mock unhealthy status response
-        unhealthy_status = {
-            "provider_id": "provider1",
-            "is_healthy": False,
-            "total_requests": 10,
-            "failure_rate": 0.8
-        }
-        health_tracker.get_health_status = AsyncMock(return_value=unhealthy_status)
-
-        result = await health_tracker.is_provider_healthy("provider1")
+    async def test_is_provider_healthy_caches_result(self, health_tracker, mock_redis, monkeypatch):
+        """Test that is_provider_healthy reuses its result until the cache TTL expires."""
+        monkeypatch.setattr(health_tracker, "get_health_status", AsyncMock(return_value={"is_healthy": False}))
 
-        assert result is False
+        with patch('src.health_tracker.time.monotonic', return_value=100.0):
+            assert await health_tracker.is_provider_healthy("provider1") is False
+            assert await health_tracker.is_provider_healthy("provider1") is False
+        assert health_tracker.get_health_status.await_count == 1
+
+        health_tracker.get_health_status.return_value = {"is_healthy": True}
+        with patch('src.health_tracker.time.monotonic', return_value=101.5):
+            assert await health_tracker.is_provider_healthy("provider1") is True
+        assert health_tracker.get_health_status.await_count == 2
 
     @pytest.mark.asyncio
-    async def test_is_provider_healthy_error_fallback(self, health_tracker, mock_redis):
-        """Test that health check defaults to healthy on error."""
-        health_tracker.get_health_status = AsyncMock(side_effect=Exception("Unexpected error"))
+    async def test_failure_makes_provider_unhealthy_straight_away(self):
+        """Test that recording a failure invalidates the cached healthy status."""
+        tracker = ProviderHealthTracker(FakeAsyncRedis(), window_duration=WINDOW_DURATION, failure_threshold=0.7)
+
+        with patch('src.health_tracker.time.monotonic', return_value=100.0):
+            assert await tracker.record_success("provider1") is True
+            assert await tracker.is_provider_healthy("provider1") is True
+
+            for _ in range(9):
+                assert await tracker.record_failure("provider1") is True
+            # Still inside the cache TTL, yet the new failures are reflected
+            assert await tracker.is_provider_healthy("provider1") is False
 
-        result = await health_tracker.is_provider_healthy("provider1")
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize(
+        "patched_tracker", [{"provider1": {"is_healthy": True, "error": "Redis error"}}], indirect=True
+    )
+    async def test_is_provider_healthy_does_not_cache_errors(self, patched_tracker):
+        """Test that the default-healthy error fallback is not cached."""
+        await patched_tracker.is_provider_healthy("provider1")
+        await patched_tracker.is_provider_healthy("provider1")
 
-        assert result is True  # Should default to healthy on error
+        assert patched_tracker.get_health_status.await_count == 2
 
     @pytest.mark.asyncio
     async def test_get_all_providers_health(self, health_tracker, mock_redis):
         """Test getting health status for all providers."""
-        # Mock responses for all three providers
-        def mock_get_health_status(provider_id):
-            return {
-                "provider_id": provider_id,
-                "is_healthy": provider_id == "provider1",  # Only provider1 is healthy
-                "total_requests": 10,
-                "failure_rate": 0.2 if provider_id == "provider1" else 0.8
-            }
-
-        health_tracker.get_health_status = AsyncMock(side_effect=mock_get_health_status)
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        # Only provider1 is healthy (20% failures); provider2 and provider3 fail 80%
+        pipe.execute.return_value = [
+            ["8", "2", None, None],  # provider1 current, previous
+            ["2", "8", None, None],  # provider2 current, previous
+            ["2", "8", None, None],  # provider3 current, previous
+        ]
 
         result = await health_tracker.get_all_providers_health()
 
@@ -341,6 +495,8 @@ class TestProviderHealthTracker:
         assert "provider1" in result["providers"]
         assert "provider2" in result["providers"]
         assert "provider3" in result["providers"]
+        assert result["providers"]["provider1"]["failure_rate"] == 0.2
+        assert result["providers"]["provider2"]["failure_rate"] == 0.8
 
         # Verify summary calculation
         assert result["summary"]["total_providers"] == 3
@@ -351,15 +507,8 @@ class TestProviderHealthTracker:
     @pytest.mark.asyncio
     async def test_get_all_providers_health_no_healthy_providers(self, health_tracker, mock_redis):
         """Test getting health status when no providers are healthy."""
-        def mock_get_health_status(provider_id):
-            return {
-                "provider_id": provider_id,
-                "is_healthy": False,
-                "total_requests": 10,
-                "failure_rate": 0.8
-            }
-
-        health_tracker.get_health_status = AsyncMock(side_effect=mock_get_health_status)
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        pipe.execute.return_value = [["2", "8", None, None]] * 3
 
         result = await health_tracker.get_all_providers_health()
 
@@ -369,44 +518,78 @@ class TestProviderHealthTracker:
         assert result["summary"]["system_healthy"] is False  # No healthy providers
 
     @pytest.mark.asyncio
-    async def test_reset_provider_health(self, health_tracker, mock_redis):
-        """Test resetting health metrics for a provider."""
-        # Configure async mock for this specific test
-        mock_redis.delete = AsyncMock(return_value=True)
+    async def test_get_all_providers_health_single_round_trip(self, health_tracker, mock_redis):
+        """Test that all provider windows are read in one pipeline and scored in one batch."""
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        pipe.execute.return_value = [["8", "2", "5", "1"]] * 3
+
+        result = await health_tracker.get_all_providers_health()
+        single = health_tracker._build_health_status(
+            "provider1", (8, 2, 5, 1), health_tracker._calculate_sliding_window_metrics(8, 2, 5, 1), 1000.0
+        )
 
-        with patch('src.health_tracker.time.time', return_value=1000.0):
-            result = await health_tracker.reset_provider_health("provider1")
+        mock_redis.pipeline.assert_called_once_with(transaction=False)
+        pipe.execute.assert_awaited_once()
+        assert pipe.hmget.call_count == 3
+        assert result["providers"]["provider1"] == single
+        assert result["timestamp"] == 1000.0
 
-            assert result is True
+    @pytest.mark.asyncio
+    async def test_get_all_providers_health_redis_error(self, health_tracker, mock_redis):
+        """Test that a failed batch read reports every provider as healthy with the error."""
+        pipe = mock_redis.pipeline.return_value.__aenter__.return_value
+        pipe.execute.side_effect = RedisError("Redis error")
+
+        result = await health_tracker.get_all_providers_health()
+
+        for status in result["providers"].values():
+            assert status["is_healthy"] is True
+            assert status["error"] == "Redis error"
+        assert result["summary"]["healthy_providers"] == 3
+
+    def test_calculate_sliding_window_metrics_batch_matches_scalar(self, health_tracker):
+        """Test that the batch metrics match the scalar calculation row by row."""
+        rows = [(8, 2, 5, 1), (2, 8, 1, 4), (0, 0, 0, 0), (3, 7, 3, 7)]
+
+        total_success, total_failure, failure_rate = (
+            health_tracker._calculate_sliding_window_metrics_batch(*zip(*rows))
+        )
+        expected = [health_tracker._calculate_sliding_window_metrics(*row) for row in rows]
 
-            # Should delete 4 keys (current and previous, success and failure)
-            assert mock_redis.delete.call_count == 1
-            call_args = mock_redis.delete.call_args[0]
-            assert len(call_args) == 4  # Should delete 4 keys
+        assert list(zip(total_success, total_failure, failure_rate)) == expected
 
-            # Verify the keys being deleted
-            current_window = int(1000.0 // 300) * 300  # 900
-            prev_window = current_window - 300  # 600
+    @pytest.mark.asyncio
+    async def test_reset_provider_health(self, health_tracker, mock_redis):
+        """Test resetting health metrics for a provider."""
+        result = await health_tracker.reset_provider_health("provider1")
 
-            expected_keys = [
-                f"health:provider1:success:{current_window}",
-                f"health:provider1:failure:{current_window}",
-                f"health:provider1:success:{prev_window}",
-                f"health:provider1:failure:{prev_window}",
-            ]
+        assert result is True
 
-            for expected_key in expected_keys:
-                assert expected_key in call_args
+        # Should delete the provider's single health hash
+        mock_redis.unlink.assert_awaited_once_with("health:provider1")
 
     @pytest.mark.asyncio
     async def test_reset_provider_health_error(self, health_tracker, mock_redis):
         """Test resetting health metrics with Redis error."""
-        mock_redis.delete.side_effect = Exception("Redis error")
+        mock_redis.unlink.side_effect = Exception("Redis error")
 
         result = await health_tracker.reset_provider_health("provider1")
 
         assert result is False
 
+    @pytest.mark.asyncio
+    async def test_reset_local_state(self, health_tracker, mock_redis):
+        """Test that reset_local_state drops in-process state without touching Redis."""
+        await health_tracker.record_failure("provider1")
+        health_tracker._healthy_cache["provider1"] = (float("inf"), False)
+
+        health_tracker.reset_local_state()
+
+        assert not health_tracker._pending
+        assert not health_tracker._local_counters
+        assert not health_tracker._healthy_cache
+        mock_redis.unlink.assert_not_called()
+
 
 class TestHealthTrackerFactory:
     """Test cases for factory functions."""
@@ -420,118 +603,110 @@ class TestHealthTrackerFactory:
         assert tracker.window_duration == 300  # 5 minutes
         assert tracker.failure_threshold == 0.7  # 70%
 
+    @pytest.mark.asyncio
+    async def test_create_health_tracker_with_pool(self):
+        """Test create_health_tracker builds its client on a shared connection pool."""
+        pool = ConnectionPool.from_url("redis://localhost:6379", max_connections=4)
+
+        tracker = await create_health_tracker(pool=pool)
+
+        assert isinstance(tracker.redis, Redis)
+        assert tracker.redis.connection_pool is pool
+
+    @pytest.mark.asyncio
+    async def test_create_health_tracker_defaults_to_process_pool(self):
+        """Test trackers built without a client share the process-wide pool."""
+        with patch('src.health_tracker._connection_pool', None):
+            first = await create_health_tracker()
+            second = await create_health_tracker()
+
+            assert first.redis.connection_pool is get_connection_pool()
+            assert second.redis.connection_pool is first.redis.connection_pool
+
 
 class TestHealthTrackerIntegration:
     """Integration tests with time-based scenarios."""
 
     @pytest.mark.asyncio
-    async def test_sliding_window_time_progression(self, health_tracker, mock_redis):
+    async def test_sliding_window_time_progression(self, health_tracker, mock_redis, frozen_time):
         """Test sliding window behavior as time progresses."""
-        # Start at beginning of window (1000.0)
-        start_time = 1000.0
-        window_duration = 300
-
-        # Mock initial state: 10 successes, 0 failures in current window
-        def mock_redis_get(key):
-            if "success" in key and str(int(start_time // window_duration) * window_duration) in key:
-                return "10"
-            return "0"
+        # Start in window 900 (1000.0)
+        next_window = CURRENT_WINDOW + WINDOW_DURATION  # 1200
 
-        mock_redis.get.side_effect = mock_redis_get
+        # Mock initial state: 10 successes, 0 failures in current window (900)
+        serve_hash_fields(mock_redis, {"health:provider1": {f"s:{CURRENT_WINDOW}": b"10", f"f:{CURRENT_WINDOW}": b"0"}})
 
-        with patch('src.health_tracker.time.time', return_value=start_time):
-            status = await health_tracker.get_health_status("provider1")
-            assert status["is_healthy"] is True
-            assert status["total_requests"] == 10
+        status = await health_tracker.get_health_status("provider1")
+        assert status["is_healthy"] is True
+        assert status["total_requests"] == 10
 
         # Move to middle of window (1000.0 + 150 = 1150.0)
-        middle_time = start_time + 150
+        middle_time = FROZEN_TIME + 150
 
         # Previous window should be weighted at ~50% (150 seconds into 300-second window)
-        def mock_redis_get_middle(key):
-            current_window = int(middle_time // window_duration) * window_duration
-            prev_window = current_window - window_duration
-
-            if "success" in key:
-                if str(current_window) in key:
-                    return "8"  # Current window successes
-                elif str(prev_window) in key:
-                    return "10"  # Previous window successes
-            return "0"  # failures are 0
-
-        mock_redis.get.side_effect = mock_redis_get_middle
-
-        with patch('src.health_tracker.time.time', return_value=middle_time):
-            status = await health_tracker.get_health_status("provider1")
-
-            # At middle_time (1150.0), the fraction into window is (1150-900)/300 = 250/300 = 0.833
-            # previous_weight = 1.0 - 0.833 = 0.167
-            # successes = current (8) + prev (10) * 0.167 = 8 + 1 = 9
-            # failures = current (0) + prev (0) * 0.167 = 0
-            # total = 9 + 0 = 9
-            assert status["total_requests"] == 9
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {
+                f"s:{CURRENT_WINDOW}": b"8",  # Current window successes
+                f"s:{PREV_WINDOW}": b"10",  # Previous window successes
+            }
+        })
 
-        # Move to next window (1000.0 + 300 = 1300.0)
-        next_window_time = start_time + window_duration
+        frozen_time.return_value = middle_time
+        status = await health_tracker.get_health_status("provider1")
 
-        def mock_redis_get_next(key):
-            current_window = int(next_window_time // window_duration) * window_duration
-            if str(current_window) in key:
-                return b"5" if "success" in key else b"0"
-            return b"0"  # Previous window data expired
+        # At middle_time (1150.0), the fraction into window is (1150-900)/300 = 250/300 = 0.833
+        # previous_weight = 1.0 - 0.833 = 0.167
+        # successes = current (8) + prev (10) * 0.167 = 8 + 1 = 9
+        # failures = current (0) + prev (0) * 0.167 = 0
+        # total = 9 + 0 = 9
+        assert status["total_requests"] == 9
 
-        mock_redis.get.side_effect = mock_redis_get_next
+        # Move to next window (1000.0 + 300 = 1300.0); previous window data expired
+        next_window_time = FROZEN_TIME + WINDOW_DURATION
+        serve_hash_fields(mock_redis, {"health:provider1": {f"s:{next_window}": b"5", f"f:{next_window}": b"0"}})
 
-        with patch('src.health_tracker.time.time', return_value=next_window_time):
-            status = await health_tracker.get_health_status("provider1")
+        frozen_time.return_value = next_window_time
+        status = await health_tracker.get_health_status("provider1")
 
-            # Should only have current window data (5 requests)
-            assert status["total_requests"] == 5
+        # Should only have current window data (5 requests)
+        assert status["total_requests"] == 5
 
     @pytest.mark.asyncio
     async def test_failure_threshold_boundary_conditions(self, health_tracker, mock_redis):
         """Test behavior around the 70% failure threshold."""
-        current_time = 1000.0
-
         # Test exactly at threshold (70% failure rate)
-        def mock_redis_at_threshold(key):
-            return "3" if "success" in key else "7"  # 7/10 = 0.7
-
-        mock_redis.get.side_effect = mock_redis_at_threshold
-
-        with patch('src.health_tracker.time.time', return_value=current_time):
-            status = await health_tracker.get_health_status("provider1")
-            # With time at 1000.0 in 300s window:
-            # fraction_into_window = (1000-900)/300 = 0.333
-            # previous_weight = 1.0 - 0.333 = 0.667
-            # weighted_prev_success = int(3 * 0.667) = 2
-            # weighted_prev_failure = int(7 * 0.667) = 4
-            # total_success = 3 + 2 = 5
-            # total_failure = 7 + 4 = 11
-            # total = 5 + 11 = 16
-            # failure_rate = 11/16 = 0.6875
-            assert abs(status["failure_rate"] - 0.688) < 0.01
-            # Since failure_rate (0.688) is less than threshold (0.7), provider is healthy
-            assert status["is_healthy"] is True  # healthy when failure_rate < threshold
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {"s:900": "3", "f:900": "7", "s:600": "3", "f:600": "7"}  # 7/10 = 0.7
+        })
 
-        # Test just below threshold (69% failure rate)
-        def mock_redis_below_threshold(key):
-            return b"31" if "success" in key else b"69"  # 69/100 = 0.69
+        status = await health_tracker.get_health_status("provider1")
+        # With time at 1000.0 in 300s window:
+        # fraction_into_window = (1000-900)/300 = 0.333
+        # previous_weight = 1.0 - 0.333 = 0.667
+        # weighted_prev_success = int(3 * 0.667) = 2
+        # weighted_prev_failure = int(7 * 0.667) = 4
+        # total_success = 3 + 2 = 5
+        # total_failure = 7 + 4 = 11
+        # total = 5 + 11 = 16
+        # failure_rate = 11/16 = 0.6875
+        assert status["failure_rate"] == pytest.approx(0.688, abs=0.01)
+        # Since failure_rate (0.688) is less than threshold (0.7), provider is healthy
+        assert status["is_healthy"] is True  # healthy when failure_rate < threshold
 
-        mock_redis.get.side_effect = mock_redis_below_threshold
+        # Test just below threshold (69% failure rate)
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {"s:900": b"31", "f:900": b"69", "s:600": b"31", "f:600": b"69"}  # 69/100 = 0.69
+        })
 
-        with patch('src.health_tracker.time.time', return_value=current_time):
-            status = await health_tracker.get_health_status("provider1")
-            assert status["is_healthy"] is True  # Should be healthy below 70%
-            assert abs(status["failure_rate"] - 0.69) < 0.01
+        status = await health_tracker.get_health_status("provider1")
+        assert status["is_healthy"] is True  # Should be healthy below 70%
+        assert status["failure_rate"] == pytest.approx(0.69, abs=0.01)
 
         # Test just above threshold (71% failure rate)
-        def mock_redis_above_threshold(key):
-            return b"29" if "success" in key else b"71"  # 71/100 = 0.71
+        serve_hash_fields(mock_redis, {
+            "health:provider1": {"s:900": b"29", "f:900": b"71", "s:600": b"29", "f:600": b"71"}  # 71/100 = 0.71
+        })
 
-        mock_redis.get.side_effect = mock_redis_above_threshold
-
-        with patch('src.health_tracker.time.time', return_value=current_time):
-            status = await health_tracker.get_health_status("provider1")
-            assert status["is_healthy"] is False  # Should be unhealthy above 70%
-            assert abs(status["failure_rate"] - 0.71) < 0.01
\ No newline at end of file
+        status = await health_tracker.get_health_status("provider1")
+        assert status["is_healthy"] is False  # Should be unhealthy above 70%
+        assert status["failure_rate"] == pytest.approx(0.71, abs=0.01)
\ No newline at end of file
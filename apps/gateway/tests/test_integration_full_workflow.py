@@ -6,88 +6,106 @@ distribution, queueing, task processing, and database persistence.
 """
 
 import asyncio
+import os
 import time
+from functools import lru_cache
+from types import MappingProxyType
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import httpx
 import pytest
+import pytest_asyncio
 from redis.asyncio import Redis
-from sqlmodel import Session
+from sqlalchemy import event, func
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, SQLModel, create_engine, select
 
+from src.config import settings as app_settings
 from src.database import (
-    get_db_engine,
+    ProviderHealthRepository,
+    SMSRequestRepository,
+    SMSResponseRepository,
     get_sms_request_repository,
     get_sms_response_repository,
 )
 from src.distribution import SMSDistributionService
 from src.health_tracker import ProviderHealthTracker
+from src.models import SMSRequest, SMSResponse  # Importing the models also registers the table metadata
 from src.rate_limiter import GlobalRateLimiter, RateLimiter
 from src.retry_service import RetryService
-from src.tasks import queue_sms_task, send_sms_to_provider, dispatch_sms
+from src.tasks import (
+    dispatch_sms,
+    queue_sms_task,
+    queue_sms_tasks_bulk,
+    select_best_provider,
+    send_sms_to_provider,
+)
+from tests.fake_async_redis import FakeAsyncRedis
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def mock_redis():
-    """Create mock Redis client for integration tests."""
-    redis = AsyncMock(spec=Redis)
+    """Create an in-memory Redis stand-in for integration tests.
 
-    # Simple in-memory store to simulate Redis key counters and TTLs
-    store = {}
+    FakeAsyncRedis keeps real state, so tests that record outcomes and read
+    counters observe the changes. reset_full_integration_components clears it per test.
+    """
+    return FakeAsyncRedis()
 
-    async def async_incr(key, amount=1):
-        store[key] = int(store.get(key, 0)) + int(amount)
-        return store[key]
 
-    async def async_expire(key, seconds):
-        # TTL not simulated beyond accepting the call
-        return True
+# Key patterns the gateway writes, cleared from a real server before each test
+GATEWAY_KEY_PATTERNS = ("rate_limit:*", "global_rate_limit", "health:*")
 
-    async def async_get(key):
-        # Return string numeric values similar to real redis.get
-        return str(store.get(key, 0))
+# Opt-in URL of a dedicated Redis for the "real" backend; its gateway keys are deleted per test
+TEST_REDIS_URL_ENV = "GATEWAY_TEST_REDIS_URL"
 
-    async def async_delete(*keys):
-        for k in keys:
-            if k in store:
-                del store[k]
-        return True
 
-    async def async_exists(*keys):
-        return any(k in store for k in keys)
+@pytest_asyncio.fixture(scope="session")
+async def real_redis_server():
+    """Connect once to the dedicated Redis named by GATEWAY_TEST_REDIS_URL.
 
-    async def async_ttl(key):
-        return 300
+    Skips unless the variable is set, so the suite never clears gateway keys on the
+    Redis at settings.redis_url, and skips when the server is not running. Only tests
+    parametrized with the "real" backend request it, so plain runs never connect.
+    """
+    redis_url = os.getenv(TEST_REDIS_URL_ENV)
+    if not redis_url:
+        pytest.skip(f"Set {TEST_REDIS_URL_ENV} to a dedicated Redis to run the real-Redis tests")
+    client = Redis.from_url(redis_url)
+    try:
+        await client.ping()
+    except Exception:
+        await client.aclose()
+        pytest.skip("Redis not available for integration tests")
+    yield client
+    await client.aclose()
 
-    async def async_multi_exec():
-        return []
 
-    # Assign async functions to mock
-    redis.incr = async_incr
-    redis.expire = async_expire
-    redis.get = async_get
-    redis.delete = async_delete
-    redis.exists = async_exists
-    redis.ttl = async_ttl
-    redis.multi_exec = async_multi_exec
+@pytest.fixture(scope="class")
+def redis_client(request, mock_redis):
+    """Redis backend for the components: the in-memory fake unless parametrized with "real"."""
+    if getattr(request, "param", "fake") == "real":
+        return request.getfixturevalue("real_redis_server")
+    return mock_redis
 
-    return redis
 
-
-@pytest.fixture
-def mock_db_session():
-    """Create mock database session."""
-    session = MagicMock(spec=Session)
-    return session
+async def clear_gateway_keys(redis) -> None:
+    """Drop the rate limit and health state the gateway keeps in Redis."""
+    if isinstance(redis, FakeAsyncRedis):
+        redis.data.clear()
+        return
+    for pattern in GATEWAY_KEY_PATTERNS:
+        keys = [key async for key in redis.scan_iter(match=pattern)]
+        if keys:
+            await redis.delete(*keys)
 
 
-@pytest.fixture
-def provider_urls():
-    """Provider URLs for testing."""
-    return {
-        "provider1": "http://provider1.com/send",
-        "provider2": "http://provider2.com/send",
-        "provider3": "http://provider3.com/send"
-    }
+# Read-only, so one frozen mapping is shared by every test
+PROVIDER_URLS = MappingProxyType({
+    "provider1": "http://provider1.com/send",
+    "provider2": "http://provider2.com/send",
+    "provider3": "http://provider3.com/send"
+})
 
 
 @pytest.fixture
@@ -116,7 +134,6 @@ def mock_broker():
     async def test_dispatch_sms(phone, text, message_id, request_id=None, exclude_providers=None, retry_count=0):
         """Test version of dispatch_sms that works synchronously."""
         # Mock the dependencies that dispatch_sms needs
-        from unittest.mock import AsyncMock
         mock_rate_limiter = AsyncMock()
         mock_rate_limiter.is_allowed = AsyncMock(return_value=(True, 1))
         mock_global_rate_limiter = AsyncMock()
@@ -127,7 +144,6 @@ def mock_broker():
         mock_distribution_service.select_provider = AsyncMock(return_value=("provider1", "http://provider1.com/send"))
 
         # Call select_best_provider with our mocks
-        from src.tasks import select_best_provider
         selection = await select_best_provider(
             mock_rate_limiter,
             mock_global_rate_limiter,
@@ -142,7 +158,6 @@ def mock_broker():
         provider_id, provider_url = selection
 
         # Instead of queuing send_sms_to_provider, call it directly for testing
-        from src.tasks import send_sms_to_provider
         result = await send_sms_to_provider(
             provider_url=provider_url,
             phone=phone,
@@ -178,39 +193,76 @@ def mock_redis_source():
 
 
 
+@pytest.fixture(scope="module")
+def integration_db_engine():
+    """Create the in-memory SQLite database and its schema once for this module.
+
+    StaticPool hands every session the same connection, so they all see one database.
+    """
+    # Keep app code that builds its own engine off the on-disk database as well,
+    # restoring the shared settings before the next module runs
+    with pytest.MonkeyPatch.context() as settings_patch:
+        settings_patch.setattr(app_settings, "database_url", "sqlite:///:memory:")
+
+        engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+
+        # pysqlite's own transaction handling breaks SAVEPOINT; let SQLAlchemy emit BEGIN itself
+        @event.listens_for(engine, "connect")
+        def _disable_pysqlite_transactions(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+
+        @event.listens_for(engine, "begin")
+        def _emit_begin(connection):
+            connection.exec_driver_sql("BEGIN")
+
+        SQLModel.metadata.create_all(engine)
+        yield engine
+        engine.dispose()
+
+
 @pytest.fixture
-def full_integration_components(mock_redis, mock_db_session, provider_urls, mock_taskiq_setup):
-    """Create all integration test components with real database."""
-    # Point app to a shared in-memory SQLite database and use the same engine as the app code
-    from src.config import settings as app_settings
+def integration_db(integration_db_engine):
+    """Run the test inside an outer transaction that is rolled back at teardown.
 
-    app_settings.database_url = "sqlite:///:memory:"
-    engine = get_db_engine()
+    Yields the connection as the bind for sessions and repositories, so every write
+    the test makes disappears with the rollback without any DELETE or DDL.
+    """
+    connection = integration_db_engine.connect()
+    transaction = connection.begin()
+    yield connection
+    transaction.rollback()
+    connection.close()
 
-    # Create tables
-    from sqlmodel import SQLModel
-    from src.models import SMSRequest, SMSResponse, SMSRetry, ProviderHealth
 
-    # Reference models to avoid unused import linting while ensuring table metadata is loaded
-    _models_ref = (SMSRequest, SMSResponse, SMSRetry, ProviderHealth)
+@pytest.fixture
+def db_session(integration_db):
+    """The test's single database session; its commits only release a SAVEPOINT."""
+    with Session(bind=integration_db, join_transaction_mode="create_savepoint") as session:
+        yield session
 
-    SQLModel.metadata.create_all(engine)
 
+@lru_cache(maxsize=None)
+def build_full_integration_components(redis_client) -> dict:
+    """Create all integration test components for a Redis backend, once per test session.
+
+    The components keep their state in Redis and in buffers that
+    reset_full_integration_components clears, so classes on the same backend share them.
+    """
     # Create real instances for full integration testing
-    health_tracker = ProviderHealthTracker(mock_redis, window_duration=300, failure_threshold=0.7)
-    rate_limiter = RateLimiter(mock_redis, rate_limit=50, window=1)
-    global_rate_limiter = GlobalRateLimiter(mock_redis, rate_limit=200, window=1)
+    health_tracker = ProviderHealthTracker(redis_client, window_duration=300, failure_threshold=0.7)
+    rate_limiter = RateLimiter(redis_client, rate_limit=50, window=1)
+    global_rate_limiter = GlobalRateLimiter(redis_client, rate_limit=200, window=1)
 
     distribution_service = SMSDistributionService(
         health_tracker=health_tracker,
         rate_limiter=rate_limiter,
         global_rate_limiter=global_rate_limiter,
-        provider_urls=provider_urls
+        provider_urls=PROVIDER_URLS
     )
 
     retry_service = RetryService(
-        redis_client=mock_redis,
-        db_session=Session(engine),  # Use real database session
+        redis_client=redis_client,
+        db_session=None,  # Bound to the test's real database session on reset
         health_tracker=health_tracker,
         max_retries=3,
         base_delay=0.1,
@@ -224,12 +276,55 @@ def full_integration_components(mock_redis, mock_db_session, provider_urls, mock
         "global_rate_limiter": global_rate_limiter,
         "distribution_service": distribution_service,
         "retry_service": retry_service,
-        "redis": mock_redis,
-        "db_engine": engine,
-        "db_session": Session(engine),
+        "redis": redis_client,
+        "db_engine": None,
+        "db_session": None,
+        "sms_request_repo": None,
+        "sms_response_repo": None,
+        "provider_health_repo": None,
     }
 
 
+@pytest.fixture(scope="class")
+def full_integration_components(redis_client):
+    """The shared integration components for the class's Redis backend.
+
+    reset_full_integration_components clears their state and binds the test's
+    database connection and session before each test.
+    """
+    return build_full_integration_components(redis_client)
+
+
+@pytest_asyncio.fixture
+async def reset_full_integration_components(full_integration_components, mock_taskiq_setup, integration_db, db_session):
+    """Return the shared components to a freshly constructed state before each test.
+
+    Health and rate limit state lives in Redis, so clearing the gateway's keys and the
+    tracker's local buffers isolates the tests; the database side comes from the test's
+    rolled-back connection and session. The task module's repository getters return
+    repositories built once on that connection for the test's duration.
+    """
+    components = full_integration_components
+    await clear_gateway_keys(components["redis"])
+    components["health_tracker"].reset_local_state()
+
+    await components["distribution_service"].reset_state()
+    components["retry_service"].reset_state()
+
+    components["retry_service"].db_session = db_session
+    components["db_engine"] = integration_db
+    components["db_session"] = db_session
+    components["sms_request_repo"] = SMSRequestRepository(engine=integration_db)
+    components["sms_response_repo"] = SMSResponseRepository(engine=integration_db)
+    components["provider_health_repo"] = ProviderHealthRepository(engine=integration_db)
+
+    with patch("src.tasks.get_sms_request_repository", return_value=components["sms_request_repo"]), \
+         patch("src.tasks.get_sms_response_repository", return_value=components["sms_response_repo"]), \
+         patch("src.tasks.get_provider_health_repository", return_value=components["provider_health_repo"]):
+        yield
+
+
+@pytest.mark.usefixtures("reset_full_integration_components")
 class TestEndToEndSMSWorkflow:
     """Test complete SMS processing workflow from request to response."""
 
@@ -238,18 +333,9 @@ class TestEndToEndSMSWorkflow:
         """Test queuing behaviour and persistence for SMS dispatch."""
         components = full_integration_components
 
-        # Patch dispatch task and ensure the task-side DB helpers used by
-        # src.tasks are patched to use the same test engine so inserts use the
-        # same SQLite memory instance.
-        from src.database import SMSRequestRepository, SMSResponseRepository, ProviderHealthRepository
-        request_repo = SMSRequestRepository(engine=components["db_engine"])
-        response_repo = SMSResponseRepository(engine=components["db_engine"])
-        health_repo = ProviderHealthRepository(engine=components["db_engine"])
-
-        with patch("src.tasks.dispatch_sms.kiq", new_callable=AsyncMock) as mock_dispatch_kiq, \
-             patch("src.tasks.get_sms_request_repository", return_value=request_repo), \
-             patch("src.tasks.get_sms_response_repository", return_value=response_repo), \
-             patch("src.tasks.get_provider_health_repository", return_value=health_repo):
+        # Patch the dispatch task; the task-side DB helpers already return repositories on
+        # the test's connection, so inserts use the same SQLite memory instance.
+        with patch("src.tasks.dispatch_sms.kiq", new_callable=AsyncMock) as mock_dispatch_kiq:
             message_id = await queue_sms_task(
                 phone="01921317475",
                 text="Test message for integration workflow",
@@ -272,6 +358,250 @@ class TestEndToEndSMSWorkflow:
         # The dispatch task being awaited is a strong indicator that queuing worked.
         # (DB checks can be re-enabled in full infra tests.)
 
+    @pytest.mark.asyncio
+    async def test_batch_sms_queue_workflow(self, full_integration_components):
+        """Test a batch of messages is queued concurrently, each with its own dispatch task."""
+        components = full_integration_components
+        messages = [("01921317475", f"Batch workflow message {i}") for i in range(5)]
+
+        with patch("src.tasks.dispatch_sms.kiq", new_callable=AsyncMock) as mock_dispatch_kiq:
+            message_ids = await asyncio.gather(*(
+                queue_sms_task(
+                    phone=phone,
+                    text=text,
+                    rate_limiter=components["rate_limiter"],
+                    global_rate_limiter=components["global_rate_limiter"],
+                    distribution_service=components["distribution_service"],
+                )
+                for phone, text in messages
+            ))
+
+        assert all(message_id and message_id.startswith("msg_") for message_id in message_ids)
+        assert len(set(message_ids)) == len(messages)
+        assert mock_dispatch_kiq.await_count == len(messages)
+        dispatched = {call.kwargs["message_id"]: call.kwargs["text"] for call in mock_dispatch_kiq.await_args_list}
+        assert dispatched == dict(zip(message_ids, (text for _, text in messages)))
+
+        # Every message was stored; checked with one COUNT rather than fetching the rows
+        persisted = components["db_session"].exec(
+            select(func.count()).select_from(SMSRequest).where(SMSRequest.text.like("Batch workflow message%"))
+        ).one()
+        assert persisted == len(messages)
+
+    @pytest.mark.asyncio
+    async def test_bulk_sms_queue_workflow(self, full_integration_components):
+        """Test a batch persisted in one transaction gets a dispatch task per stored request."""
+        components = full_integration_components
+        messages = [{"phone": f"019213174{i % 5:02d}", "text": f"Concurrent test message {i}"} for i in range(20)]
+
+        with patch("src.tasks.dispatch_sms.kiq", new_callable=AsyncMock) as mock_dispatch_kiq:
+            message_ids = await queue_sms_tasks_bulk(messages)
+
+        assert len(message_ids) == len(messages)
+        assert all(message_id and message_id.startswith("msg_") for message_id in message_ids)
+        assert mock_dispatch_kiq.await_count == len(messages)
+
+        # Every dispatch points at its own stored request, moved to processing once enqueued
+        request_ids = [call.kwargs["request_id"] for call in mock_dispatch_kiq.await_args_list]
+        stored = components["sms_request_repo"].get_requests_by_ids(request_ids)
+        assert {request.text for request in stored} == {message["text"] for message in messages}
+        assert {request.status for request in stored} == {"processing"}
+
+    @pytest.mark.asyncio
+    async def test_bulk_sms_queue_enqueue_failure_leaves_request_pending(self, full_integration_components):
+        """Test a request whose dispatch task could not be enqueued is not left in processing."""
+        components = full_integration_components
+        messages = [{"phone": "01921317475", "text": f"Partial batch message {i}"} for i in range(3)]
+
+        with patch(
+            "src.tasks.dispatch_sms.kiq",
+            new_callable=AsyncMock,
+            side_effect=[None, ConnectionError("Broker unavailable"), None],
+        ) as mock_dispatch_kiq:
+            message_ids = await queue_sms_tasks_bulk(messages)
+
+        assert message_ids[1] is None
+        assert all(message_ids[i] for i in (0, 2))
+
+        request_ids = [call.kwargs["request_id"] for call in mock_dispatch_kiq.await_args_list]
+        statuses = {
+            request.id: request.status
+            for request in components["sms_request_repo"].get_requests_by_ids(request_ids)
+        }
+        assert [statuses[request_id] for request_id in request_ids] == ["processing", "pending", "processing"]
+
+
+
+class TestDatabasePersistenceIntegration:
+    """Test request lookups against the shared SQLite database."""
+
+    def test_get_requests_by_ids(self, integration_db, db_session):
+        """Test a batch of requests is fetched by ID in one query instead of a filtered scan."""
+        requests = [SMSRequest(phone="01921317475", text=f"Batch message {i}") for i in range(5)]
+        db_session.add_all(requests)
+        db_session.commit()
+        request_ids = [request.id for request in requests]
+
+        repository = SMSRequestRepository(engine=integration_db)
+        fetched = repository.get_requests_by_ids(request_ids[1:4])
+
+        assert sorted(request.id for request in fetched) == request_ids[1:4]
+        assert {request.text for request in fetched} == {f"Batch message {i}" for i in range(1, 4)}
+        assert repository.get_requests_by_ids([]) == []
+
+    def test_get_responses_by_request_id(self, integration_db, db_session):
+        """Test a request's responses come back in order from the indexed request_id lookup."""
+        requests = [SMSRequest(phone="01921317475", text=f"Retry message {i}") for i in range(2)]
+        db_session.add_all(requests)
+        db_session.commit()
+        ours, other = (request.id for request in requests)
+        db_session.add_all([
+            SMSResponse(request_id=ours, response_data="HTTP 500", status_code=500),
+            SMSResponse(request_id=other, response_data="OK", status_code=200),
+            SMSResponse(request_id=ours, response_data="OK", status_code=200),
+        ])
+        db_session.commit()
+
+        responses = SMSResponseRepository(engine=integration_db).get_responses_by_request_id(ours)
+
+        assert [response.status_code for response in responses] == [500, 200]
+        assert all(response.request_id == ours for response in responses)
+
+    def test_get_request_by_phone_text(self, integration_db, db_session):
+        """Test a request is found by phone and text with one indexed query instead of a list scan."""
+        db_session.add_all([
+            SMSRequest(phone=f"019213174{i % 5:02d}", text=f"Concurrent test message {i}") for i in range(20)
+        ])
+        db_session.commit()
+
+        repository = SMSRequestRepository(engine=integration_db)
+        found = repository.get_request_by_phone_text("01921317402", "Concurrent test message 7")
+
+        assert found is not None
+        assert (found.phone, found.text) == ("01921317402", "Concurrent test message 7")
+        assert repository.get_request_by_phone_text("01921317402", "Concurrent test message 8") is None
+
+    def test_request_counts_and_stats(self, integration_db, db_session):
+        """Test counts and stats come from SQL aggregates rather than len() over loaded rows."""
+        outcomes = [("completed", "provider1")] * 3 + [("failed", "provider2")] * 2 + [("pending", None)]
+        db_session.add_all([
+            SMSRequest(phone="01921317475", text=f"Count message {i}", status=status, provider_used=provider)
+            for i, (status, provider) in enumerate(outcomes)
+        ])
+        db_session.commit()
+
+        repository = SMSRequestRepository(engine=integration_db)
+
+        assert repository.count() == 6
+        assert repository.count(status="completed") == 3
+        assert repository.count(status="failed", provider="provider2") == 2
+        assert repository.count(provider="provider3") == 0
+
+        stats = repository.get_request_stats()
+        assert stats["total_requests"] == 6
+        assert stats["recent_requests"] == 6
+        assert stats["status_breakdown"] == {"pending": 1, "processing": 0, "completed": 3, "failed": 2}
+        assert stats["provider_breakdown"] == {"provider1": 3, "provider2": 2, "provider3": 0}
+        assert SMSResponseRepository(engine=integration_db).count() == 0
+
+
+async def prime_rate_limit(redis, key: str, count: int, window: int) -> None:
+    """Advance a rate limit counter by count with one pipelined round-trip instead of count requests."""
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.incr(key, count)
+        pipe.expire(key, window)
+        await pipe.execute()
+
+
+# In-memory fake everywhere; the rate limit tests also run once against a real server
+REDIS_BACKENDS = ["fake", pytest.param("real", marks=pytest.mark.integration)]
+
+
+@pytest.mark.parametrize("redis_client", REDIS_BACKENDS, indirect=True, scope="class")
+@pytest.mark.usefixtures("reset_full_integration_components")
+class TestRedisRateLimitingIntegration:
+    """Test rate limiting against the stateful in-memory Redis."""
+
+    @pytest.mark.asyncio
+    async def test_redis_rate_limiting_integration(self, full_integration_components):
+        """Test the provider limit trips on real INCR counts and selection routes around it."""
+        components = full_integration_components
+        rate_limiter = components["rate_limiter"]
+
+        # Step 1: Prime 49 requests in one pipelined round-trip, then cross the limit of 50
+        await prime_rate_limit(components["redis"], rate_limiter._get_key("provider1"), 49, rate_limiter.window)
+        results = [await rate_limiter.is_allowed("provider1") for _ in range(6)]
+
+        assert [allowed for allowed, _ in results] == [True] + [False] * 5
+        assert [count for _, count in results] == list(range(50, 56))
+
+        # Step 2: Verify rate limiting is reported
+        rate_stats = await rate_limiter.get_rate_limit_stats("provider1")
+        assert rate_stats["is_limited"] is True
+        assert rate_stats["current_count"] == 55
+
+        # Step 3: Provider selection should avoid rate-limited provider1
+        selected = await components["distribution_service"].select_provider()
+        assert selected is not None
+        assert selected[0] != "provider1"
+
+    @pytest.mark.asyncio
+    async def test_global_rate_limiting_integration(self, full_integration_components):
+        """Test a burst past the global limit is capped and blocks further selection."""
+        components = full_integration_components
+        global_rate_limiter = components["global_rate_limiter"]
+
+        # Step 1: Exhaust global rate limit with a 205-request burst against the limit of 200
+        allowed_count, count = await global_rate_limiter.is_allowed_batch(205)
+        assert (allowed_count, count) == (200, 200)
+
+        # Step 2: Verify further requests are denied
+        allowed, _ = await global_rate_limiter.is_allowed()
+        assert allowed is False
+        assert await global_rate_limiter.get_current_count() >= 200
+
+        # Step 3: Selection should return None due to global rate limiting
+        assert await components["distribution_service"].select_provider() is None
+
+
+@pytest.mark.usefixtures("reset_full_integration_components")
+class TestSystemIntegrationUnderLoad:
+    """Test system integration under various load conditions."""
+
+    @pytest.mark.asyncio
+    async def test_high_throughput_integration(self, full_integration_components):
+        """Test 150 messages are queued concurrently and each is persisted."""
+        components = full_integration_components
+
+        # Step 1: Queue 150 messages at once so their Redis and database round-trips overlap
+        phones = [f"019213174{digit:02d}" for digit in range(10)]  # Rotate through 10 phone numbers
+        texts = [f"High throughput test message {i}" for i in range(150)]
+        start_time = time.perf_counter()
+        with patch("src.tasks.dispatch_sms.kiq", new_callable=AsyncMock) as mock_dispatch_kiq:
+            results = await asyncio.gather(*(
+                queue_sms_task(
+                    phone=phones[i % 10],
+                    text=texts[i],
+                    rate_limiter=components["rate_limiter"],
+                    global_rate_limiter=components["global_rate_limiter"],
+                    distribution_service=components["distribution_service"],
+                )
+                for i in range(150)
+            ), return_exceptions=True)
+        duration = time.perf_counter() - start_time
+
+        # Step 2: Verify throughput performance
+        successful_queued = sum(1 for result in results if isinstance(result, str))
+        assert successful_queued == 150
+        assert mock_dispatch_kiq.await_count == 150
+        assert duration < 10.0
+
+        # Step 3: Verify database persistence under load with one COUNT query
+        persisted = components["db_session"].exec(
+            select(func.count()).select_from(SMSRequest).where(SMSRequest.text.like("High throughput test%"))
+        ).one()
+        assert persisted == successful_queued
+
 
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
\ No newline at end of file
@@ -18,17 +18,18 @@ from src.middleware import (
 from src.rate_limiter import RateLimiter, GlobalRateLimiter
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app():
-    """Create FastAPI test app."""
+    """Create FastAPI test app once for the module."""
     app = FastAPI()
     return app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def test_client(app):
-    """Create test client."""
-    return TestClient(app)
+    """Create test client once for the module."""
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture
@@ -36,6 +37,7 @@ def mock_rate_limiter():
     """Create mock rate limiter."""
     limiter = AsyncMock(spec=RateLimiter)
     limiter.is_allowed = AsyncMock(return_value=(True, 1))
+    limiter.is_allowed_bulk = AsyncMock(return_value={"provider1": (True, 1)})
     limiter.get_current_count = AsyncMock(return_value=1)
     return limiter
 
@@ -113,15 +115,16 @@ class TestRateLimitingMiddleware:
 
         assert response.status_code == 429
         assert "Global rate limit exceeded" in response.body.decode()
-        middleware.rate_limiter.is_allowed.assert_not_called()
+        middleware.rate_limiter.is_allowed_bulk.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_dispatch_provider_rate_limit_exceeded(self, middleware):
         """Test response when all providers are rate limited."""
         # Setup rate limiters
         middleware.global_rate_limiter.is_allowed = AsyncMock(return_value=(True, 1))
-        # Use a side-effect function so repeated calls don't exhaust a finite iterator
-        middleware.rate_limiter.is_allowed = AsyncMock(side_effect=lambda provider_id: (False, 51))
+        middleware.rate_limiter.is_allowed_bulk = AsyncMock(return_value={
+            "provider1": (False, 60), "provider2": (False, 60), "provider3": (False, 60)
+        })
 
         # Create mock request for SMS endpoint
         mock_request = AsyncMock(spec=Request)
@@ -134,6 +137,9 @@ class TestRateLimitingMiddleware:
 
         assert response.status_code == 429
         assert "All SMS providers are rate limited" in response.body.decode()
+        # One bulk round-trip for the check and one for the 429 details, none per provider
+        assert middleware.rate_limiter.is_allowed_bulk.await_count == 2
+        middleware.rate_limiter.is_allowed.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_dispatch_successful_request(self, middleware):
@@ -158,16 +164,21 @@ class TestRateLimitingMiddleware:
     @pytest.mark.asyncio
     async def test_check_provider_limits_all_allowed(self, middleware):
         """Test _check_provider_limits when all providers are available."""
-        middleware.rate_limiter.is_allowed = AsyncMock(return_value=(True, 1))
+        middleware.rate_limiter.is_allowed_bulk = AsyncMock(return_value={"provider1": (True, 1)})
 
         result = await middleware._check_provider_limits()
 
         assert result is False  # False means at least one provider is available
+        middleware.rate_limiter.is_allowed_bulk.assert_awaited_once_with(
+            ["provider1", "provider2", "provider3"], stop_on_allowed=True
+        )
 
     @pytest.mark.asyncio
     async def test_check_provider_limits_all_limited(self, middleware):
         """Test _check_provider_limits when all providers are rate limited."""
-        middleware.rate_limiter.is_allowed = AsyncMock(return_value=(False, 51))
+        middleware.rate_limiter.is_allowed_bulk = AsyncMock(return_value={
+            "provider1": (False, 51), "provider2": (False, 51), "provider3": (False, 51)
+        })
 
         result = await middleware._check_provider_limits()
 
@@ -178,9 +189,9 @@ class TestRateLimitingMiddleware:
         """Test _get_rate_limit_info method."""
         # Setup mocks
         middleware.global_rate_limiter.is_allowed = AsyncMock(return_value=(False, 201))
-        middleware.rate_limiter.is_allowed = AsyncMock(side_effect=[
-            (False, 51), (True, 25), (False, 51)
-        ])
+        middleware.rate_limiter.is_allowed_bulk = AsyncMock(return_value={
+            "provider1": (False, 51), "provider2": (True, 25), "provider3": (False, 51)
+        })
 
         info = await middleware._get_rate_limit_info()
 
@@ -319,6 +330,7 @@ class TestMiddlewareIntegration:
 
             mock_rate_limiter = AsyncMock()
             mock_rate_limiter.is_allowed = AsyncMock(return_value=(True, 1))
+            mock_rate_limiter.is_allowed_bulk = AsyncMock(return_value={"provider1": (True, 1)})
             mock_global_rate_limiter = AsyncMock()
             mock_global_rate_limiter.is_allowed = AsyncMock(return_value=(True, 1))
             mock_create_rate_limiter.return_value = mock_rate_limiter
@@ -6,9 +6,10 @@ import asyncio
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
+import pytest_asyncio
 from fastapi import FastAPI
 from fastapi.testclient import TestClient
-from redis.asyncio import Redis
+from httpx import ASGITransport, AsyncClient
 from sqlmodel import SQLModel, create_engine
 from sqlalchemy.orm import sessionmaker
 
@@ -19,9 +20,9 @@ from src.database import get_sms_request_repository, get_sms_response_repository
 
 
 # Test fixtures
-@pytest.fixture
+@pytest.fixture(scope="module")
 def app():
-    """Create FastAPI test app."""
+    """Create FastAPI test app once for the module; tests patch its dependencies per call."""
     test_app = FastAPI()
     test_app.include_router(router, prefix="/api/sms")
     
@@ -32,16 +33,24 @@ def app():
     return test_app
 
 
-@pytest.fixture
+@pytest.fixture(scope="module")
 def client(app):
-    """Create test client."""
-    return TestClient(app)
+    """Create test client once for the module."""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest_asyncio.fixture
+async def ac(app):
+    """Create async client that runs the app on the test's event loop."""
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as async_client:
+        yield async_client
 
 
 @pytest.fixture
 def mock_redis():
     """Create mock Redis client for tests."""
-    redis = AsyncMock(spec=Redis)
+    redis = AsyncMock()
     # Configure mock Redis methods
     redis.incr = AsyncMock(return_value=1)
     redis.expire = AsyncMock(return_value=True)
@@ -175,7 +184,7 @@ class TestSMSQueueEndpoints:
     """Test SMS queue endpoints."""
 
     @pytest.mark.asyncio
-    async def test_send_sms_success(self, client, mock_redis, mock_rate_limiter, mock_global_rate_limiter, test_db_engine):
+    async def test_send_sms_success(self, ac, mock_redis, mock_rate_limiter, mock_global_rate_limiter, test_db_engine):
         """Test successful SMS sending."""
         # Mock the dependencies
         with (
@@ -224,7 +233,7 @@ class TestSMSQueueEndpoints:
             # Call the initialize_database function to ensure it doesn't interfere
             mock_initialize_database.return_value = None
     
-            response = client.post(
+            response = await ac.post(
                 "/api/sms/send",
                 json={
                     "phone": "01921317475",
@@ -247,7 +256,7 @@ class TestSMSQueueEndpoints:
                 assert "detail" in data or "error" in data
 
     @pytest.mark.asyncio
-    async def test_send_sms_global_rate_limited(self, client, mock_redis, mock_global_rate_limiter, test_db_engine):
+    async def test_send_sms_global_rate_limited(self, ac, mock_redis, mock_global_rate_limiter, test_db_engine):
         """Test SMS sending when globally rate limited."""
         # Mock global rate limiter to deny requests
         mock_global_rate_limiter.is_allowed.return_value = (False, 250)
@@ -281,7 +290,7 @@ class TestSMSQueueEndpoints:
             # Call the initialize_database function to ensure it doesn't interfere
             mock_initialize_database.return_value = None
 
-            response = client.post(
+            response = await ac.post(
                 "/api/sms/send",
                 json={
                     "phone": "01921317475",
@@ -294,7 +303,7 @@ class TestSMSQueueEndpoints:
             assert "Global rate limit exceeded" in data["detail"]["error"]
 
     @pytest.mark.asyncio
-    async def test_send_sms_no_provider_available(self, client, mock_redis, mock_rate_limiter, mock_global_rate_limiter, test_db_engine):
+    async def test_send_sms_no_provider_available(self, ac, mock_redis, mock_rate_limiter, mock_global_rate_limiter, test_db_engine):
         """Test SMS sending when no provider available."""
         # Mock rate limiter to deny all providers
         mock_rate_limiter.is_allowed.return_value = (False, 60)
@@ -328,7 +337,7 @@ class TestSMSQueueEndpoints:
             # Call the initialize_database function to ensure it doesn't interfere
             mock_initialize_database.return_value = None
 
-            response = client.post(
+            response = await ac.post(
                 "/api/sms/send",
                 json={
                     "phone": "01921317475",
@@ -1,17 +1,18 @@
 import pytest
 import asyncio
+from unittest.mock import AsyncMock
 
-from src.rate_limiter import RateLimiter
+from src.rate_limiter import PROVIDER_CHECK_SCRIPT, RateLimiter
 
 @pytest.mark.asyncio
 async def test_rate_limiter_uses_fixed_key_and_incr_expire(mock_redis):
     """
     Instantiate RateLimiter with window=1 and provider_id 'provider1'.
-    Call is_allowed twice and assert Redis.INCR called with identical fixed key
-    and EXPIRE called only once. Also assert no timestamp suffix in the key.
+    Call is_allowed twice and assert the INCR/EXPIRE script ran with the identical
+    fixed key and the window, once per call. Also assert no timestamp suffix in the key.
     """
-    # Make incr return 1 on first call and 2 on second call
-    mock_redis.incr.side_effect = [1, 2]
+    # Make the script return 1 on first call and 2 on second call
+    mock_redis.eval = AsyncMock(side_effect=[1, 2])
 
     rl = RateLimiter(redis_client=mock_redis, rate_limit=50, window=1)
 
@@ -20,19 +21,21 @@ async def test_rate_limiter_uses_fixed_key_and_incr_expire(mock_redis):
     # Second call in same window
     allowed2, count2 = await rl.is_allowed("provider1")
 
-    # Assert Redis.incr was called twice with identical key
-    assert mock_redis.incr.call_count == 2
-    calls = mock_redis.incr.call_args_list
-    key_call_1 = calls[0][0][0]
-    key_call_2 = calls[1][0][0]
+    # Assert the script was called twice with identical key
+    assert mock_redis.eval.call_count == 2
+    calls = mock_redis.eval.call_args_list
+    key_call_1 = calls[0][0][2]
+    key_call_2 = calls[1][0][2]
     assert key_call_1 == "rate_limit:provider1"
     assert key_call_2 == "rate_limit:provider1"
     # Ensure no timestamp suffix (key should equal exactly the fixed pattern)
     assert ":" in key_call_1  # pattern includes provider separator
     assert key_call_1 == "rate_limit:provider1"
 
-    # Expire should be called only once (on first increment == 1)
-    mock_redis.expire.assert_called_once_with("rate_limit:provider1", 1)
+    # The script applies the expiry itself (on first increment == 1); no separate commands
+    assert all(call[0][:2] == (PROVIDER_CHECK_SCRIPT, 1) and call[0][3] == 1 for call in calls)
+    mock_redis.incr.assert_not_called()
+    mock_redis.expire.assert_not_called()
 
     # Validate returned counts and allowed flags reflect side_effects
     assert count1 == 1
@@ -10,13 +10,19 @@ import pytest
 from redis.asyncio import Redis
 from redis.exceptions import ConnectionError, TimeoutError, RedisError
 
-from src.rate_limiter import RateLimiter, GlobalRateLimiter, create_rate_limiter, create_global_rate_limiter
+from src.rate_limiter import (
+    PROVIDER_CHECK_SCRIPT,
+    RateLimiter,
+    GlobalRateLimiter,
+    create_rate_limiter,
+    create_global_rate_limiter,
+)
 
 
 @pytest.fixture
 def mock_redis():
     """Create mock Redis client."""
-    redis = AsyncMock(spec=Redis)
+    redis = AsyncMock()
     return redis
 
 
@@ -49,21 +55,22 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_first_request(self, rate_limiter, mock_redis):
         """Test first request is always allowed."""
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
+        mock_redis.eval = AsyncMock(return_value=1)
 
         with patch('src.rate_limiter.time.time', return_value=1000.0):
             allowed, count = await rate_limiter.is_allowed("provider1")
 
             assert allowed is True
             assert count == 1
-            mock_redis.incr.assert_called_once()
-            mock_redis.expire.assert_called_once_with("rate_limit:provider1", 1)
+            # INCR and the window expiry are one script call, never separate commands
+            mock_redis.eval.assert_called_once_with(PROVIDER_CHECK_SCRIPT, 1, "rate_limit:provider1", 1)
+            mock_redis.incr.assert_not_called()
+            mock_redis.expire.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_is_allowed_within_limit(self, rate_limiter, mock_redis):
         """Test requests within limit are allowed."""
-        mock_redis.incr = AsyncMock(return_value=3)
+        mock_redis.eval = AsyncMock(return_value=3)
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
@@ -73,7 +80,7 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_exceeds_limit(self, rate_limiter, mock_redis):
         """Test requests exceeding limit are denied."""
-        mock_redis.incr = AsyncMock(return_value=6)  # Exceeds limit of 5
+        mock_redis.eval = AsyncMock(return_value=6)  # Exceeds limit of 5
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
@@ -204,7 +211,7 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_redis_connection_error(self, rate_limiter, mock_redis):
         """Test is_allowed with Redis connection error."""
-        mock_redis.incr = AsyncMock(side_effect=ConnectionError("Connection failed"))
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
@@ -214,7 +221,7 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_redis_timeout_error(self, rate_limiter, mock_redis):
         """Test is_allowed with Redis timeout error."""
-        mock_redis.incr = AsyncMock(side_effect=TimeoutError("Timeout"))
+        mock_redis.eval = AsyncMock(side_effect=TimeoutError("Timeout"))
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
@@ -224,7 +231,7 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_redis_error(self, rate_limiter, mock_redis):
         """Test is_allowed with general Redis error."""
-        mock_redis.incr = AsyncMock(side_effect=RedisError("Redis error"))
+        mock_redis.eval = AsyncMock(side_effect=RedisError("Redis error"))
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
@@ -234,13 +241,69 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_is_allowed_unexpected_error(self, rate_limiter, mock_redis):
         """Test is_allowed with unexpected error."""
-        mock_redis.incr = AsyncMock(side_effect=Exception("Unexpected error"))
+        mock_redis.eval = AsyncMock(side_effect=Exception("Unexpected error"))
 
         allowed, count = await rate_limiter.is_allowed("provider1")
 
         assert allowed is False  # Should deny on unexpected error
         assert count == 6  # rate_limit + 1
 
+    @pytest.mark.asyncio
+    async def test_is_allowed_bulk_single_round_trip(self, rate_limiter, mock_redis):
+        """Test several providers are checked with one EVAL call."""
+        mock_redis.eval = AsyncMock(return_value=[6, 3])
+
+        results = await rate_limiter.is_allowed_bulk(["provider1", "provider2", "provider3"], stop_on_allowed=True)
+
+        # The script stopped at provider2, so provider3 is neither counted nor reported
+        assert results == {"provider1": (False, 6), "provider2": (True, 3)}
+        mock_redis.eval.assert_called_once()
+        args = mock_redis.eval.call_args.args
+        assert args[1:] == (3, "rate_limit:provider1", "rate_limit:provider2", "rate_limit:provider3", 5, 1, 1)
+
+    @pytest.mark.asyncio
+    async def test_is_allowed_fail_closed_reraises_redis_error(self, rate_limiter, mock_redis):
+        """Test fail_open=False surfaces Redis errors instead of allowing the request."""
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
+
+        with pytest.raises(ConnectionError):
+            await rate_limiter.is_allowed("provider1", fail_open=False)
+
+        mock_redis.eval = AsyncMock(side_effect=RedisError("Redis error"))
+        with pytest.raises(RedisError):
+            await rate_limiter.is_allowed("provider1", fail_open=False)
+
+    @pytest.mark.asyncio
+    async def test_is_allowed_bulk_redis_error(self, rate_limiter, mock_redis):
+        """Test Redis errors allow every provider like is_allowed does."""
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
+
+        results = await rate_limiter.is_allowed_bulk(["provider1", "provider2"])
+
+        assert results == {"provider1": (True, 0), "provider2": (True, 0)}
+
+    @pytest.mark.asyncio
+    async def test_reserve_batch_single_round_trip(self, rate_limiter, mock_redis):
+        """Test per-provider slots for a batch are reserved with one EVAL call."""
+        mock_redis.eval = AsyncMock(return_value=[5, 2])
+
+        granted = await rate_limiter.reserve_batch({"provider1": 7, "provider2": 2})
+
+        assert granted == {"provider1": 5, "provider2": 2}
+        mock_redis.eval.assert_called_once()
+        assert mock_redis.eval.call_args.args[1:] == (
+            2, "rate_limit:provider1", "rate_limit:provider2", 7, 2, 5, 1
+        )
+
+    @pytest.mark.asyncio
+    async def test_reserve_batch_redis_error(self, rate_limiter, mock_redis):
+        """Test Redis errors grant every requested slot like is_allowed does."""
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
+
+        granted = await rate_limiter.reserve_batch({"provider1": 7})
+
+        assert granted == {"provider1": 7}
+
     @pytest.mark.asyncio
     async def test_get_current_count_redis_error(self, rate_limiter, mock_redis):
         """Test get_current_count with Redis error."""
@@ -266,7 +329,7 @@ class TestRateLimiter:
         # Provider 2: at limit (5/5)
         # Provider 3: over limit (6/5)
 
-        def mock_incr_side_effect(key):
+        def mock_eval_side_effect(script, numkeys, key, window):
             if "provider1" in key:
                 return 3  # First call returns 3, second call returns 4
             elif "provider2" in key:
@@ -275,8 +338,7 @@ class TestRateLimiter:
                 return 7  # Over limit
             return 1
 
-        mock_redis.incr = AsyncMock(side_effect=mock_incr_side_effect)
-        mock_redis.expire = AsyncMock(return_value=True)
+        mock_redis.eval = AsyncMock(side_effect=mock_eval_side_effect)
 
         rate_limiter = RateLimiter(mock_redis, rate_limit=5, window=1)
 
@@ -298,26 +360,26 @@ class TestRateLimiter:
     @pytest.mark.asyncio
     async def test_window_expiry_behavior(self, mock_redis):
         """Test that counters reset after window expiry."""
-        # First request in new window
-        mock_redis.incr = AsyncMock(return_value=1)
-        mock_redis.expire = AsyncMock(return_value=True)
+        # First request in new window; the script sets the window expiry
+        mock_redis.eval = AsyncMock(return_value=1)
 
         rate_limiter = RateLimiter(mock_redis, rate_limit=5, window=1)
 
         allowed, count = await rate_limiter.is_allowed("provider1")
         assert allowed is True
         assert count == 1
-        mock_redis.expire.assert_called_once()
+        mock_redis.eval.assert_called_once_with(PROVIDER_CHECK_SCRIPT, 1, "rate_limit:provider1", 1)
 
         # Reset mock for next call
         mock_redis.reset_mock()
-        mock_redis.incr = AsyncMock(return_value=2)
+        mock_redis.eval = AsyncMock(return_value=2)
 
-        # Second request in same window
+        # Second request in same window still costs one round-trip, with no separate EXPIRE
         allowed, count = await rate_limiter.is_allowed("provider1")
         assert allowed is True
         assert count == 2
-        mock_redis.expire.assert_not_called()  # Should not expire again
+        mock_redis.eval.assert_called_once()
+        mock_redis.expire.assert_not_called()
 
     @pytest.mark.asyncio
     async def test_high_load_scenario(self, mock_redis):
@@ -325,15 +387,14 @@ class TestRateLimiter:
         rate_limiter = RateLimiter(mock_redis, rate_limit=100, window=1)
 
         # Simulate 150 concurrent requests
-        def mock_incr_load_test(key):
+        def mock_eval_load_test(script, numkeys, key, window):
             # Simulate counter going from 50 to 150
-            if not hasattr(mock_incr_load_test, 'call_count'):
-                mock_incr_load_test.call_count = 0
-            mock_incr_load_test.call_count += 1
-            return mock_incr_load_test.call_count + 49
+            if not hasattr(mock_eval_load_test, 'call_count'):
+                mock_eval_load_test.call_count = 0
+            mock_eval_load_test.call_count += 1
+            return mock_eval_load_test.call_count + 49
 
-        mock_redis.incr = AsyncMock(side_effect=mock_incr_load_test)
-        mock_redis.expire = AsyncMock(return_value=True)
+        mock_redis.eval = AsyncMock(side_effect=mock_eval_load_test)
 
         # First 100 requests should be allowed
         allowed, count = await rate_limiter.is_allowed("provider1")
@@ -342,10 +403,10 @@ class TestRateLimiter:
 
         # Reset for next call simulation
         mock_redis.reset_mock()
-        def mock_incr_second_call(key):
+        def mock_eval_second_call(script, numkeys, key, window):
             return 101  # Would be rate limited
 
-        mock_redis.incr = AsyncMock(side_effect=mock_incr_second_call)
+        mock_redis.eval = AsyncMock(side_effect=mock_eval_second_call)
 
         # 101st request should be denied
         allowed, count = await rate_limiter.is_allowed("provider1")
@@ -377,6 +438,72 @@ class TestGlobalRateLimiter:
         assert allowed is False
         assert count == 11
 
+    @pytest.mark.asyncio
+    async def test_check_with_provider_single_round_trip(self, global_rate_limiter, mock_redis):
+        """Test global and provider limits are checked with one EVAL call."""
+        mock_redis.eval = AsyncMock(return_value=[1, 3])
+
+        allowed, count = await global_rate_limiter.check_with_provider("rate_limit:provider1", 5)
+
+        assert allowed is True
+        assert count == 3
+        mock_redis.eval.assert_called_once()
+        args = mock_redis.eval.call_args.args
+        assert args[1:] == (2, "global_rate_limit", "rate_limit:provider1", 10, 5)
+
+    @pytest.mark.asyncio
+    async def test_check_with_global_uses_provider_key_and_limit(self, rate_limiter, global_rate_limiter, mock_redis):
+        """Test RateLimiter.check_with_global passes its own key and limit to the combined check."""
+        mock_redis.eval = AsyncMock(return_value=[1, 3])
+
+        allowed, count = await rate_limiter.check_with_global("provider1", global_rate_limiter)
+
+        assert (allowed, count) == (True, 3)
+        assert mock_redis.eval.call_args.args[1:] == (2, "global_rate_limit", "rate_limit:provider1", 10, 5)
+
+    @pytest.mark.asyncio
+    async def test_check_with_provider_limited(self, global_rate_limiter, mock_redis):
+        """Test denial reported by the script is propagated."""
+        mock_redis.eval = AsyncMock(return_value=[0, 10])
+
+        allowed, count = await global_rate_limiter.check_with_provider("rate_limit:provider1", 5)
+
+        assert allowed is False
+        assert count == 10
+
+    @pytest.mark.asyncio
+    async def test_check_with_provider_redis_error(self, global_rate_limiter, mock_redis):
+        """Test Redis errors bypass the check like is_allowed does."""
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
+
+        allowed, count = await global_rate_limiter.check_with_provider("rate_limit:provider1", 5)
+
+        assert allowed is True
+        assert count == 0
+
+
+    @pytest.mark.asyncio
+    async def test_is_allowed_batch_single_round_trip(self, global_rate_limiter, mock_redis):
+        """Test a burst reserves its slots with one EVAL call."""
+        mock_redis.eval = AsyncMock(return_value=[10, 10])
+
+        allowed, count = await global_rate_limiter.is_allowed_batch(15)
+
+        assert allowed == 10
+        assert count == 10
+        mock_redis.eval.assert_called_once()
+        args = mock_redis.eval.call_args.args
+        assert args[1:] == (1, "global_rate_limit", 15, 10, 1)
+
+    @pytest.mark.asyncio
+    async def test_is_allowed_batch_redis_error(self, global_rate_limiter, mock_redis):
+        """Test Redis errors admit the whole burst like is_allowed does."""
+        mock_redis.eval = AsyncMock(side_effect=ConnectionError("Connection failed"))
+
+        allowed, count = await global_rate_limiter.is_allowed_batch(15)
+
+        assert allowed == 15
+        assert count == 0
 
 class TestFactoryFunctions:
     """Test cases for factory functions."""
@@ -8,9 +8,10 @@ to ensure it meets the requirements for the SMS gateway service.
 import asyncio
 import time
 import pytest
-from unittest.mock import AsyncMock
+from types import SimpleNamespace
 
 from src.rate_limiter import RateLimiter, GlobalRateLimiter
+from tests.fake_async_redis import FakeAsyncRedis
 
 
 class TestHighLoadRateLimiting:
@@ -20,31 +21,11 @@ class TestHighLoadRateLimiting:
     @pytest.mark.asyncio
     async def test_provider_rate_limiting_200_rps_input(self):
         """Test that each provider respects 50 RPS limit under 200 RPS input."""
-        mock_redis = AsyncMock()
+        mock_redis = FakeAsyncRedis()
         rate_limiter = RateLimiter(mock_redis, rate_limit=50, window=1)
 
-        # Mock Redis to simulate time windows
         current_time = 1000.0
 
-        def mock_get_key(provider_id):
-            return f"rate_limit:{provider_id}:{int(current_time)}"
-
-        # Mock Redis INCR to return incrementing values
-        incr_calls = {}
-
-        async def mock_incr(key):
-            provider = key.split(':')[1]
-            if provider not in incr_calls:
-                incr_calls[provider] = 0
-            incr_calls[provider] += 1
-            return incr_calls[provider]
-
-        async def mock_expire(key, seconds):
-            return True
-
-        mock_redis.incr = mock_incr
-        mock_redis.expire = mock_expire
-
         # Simulate 200 RPS input (200 requests in 1 second)
         total_requests = 200
         allowed_requests_per_provider = {}
@@ -71,34 +52,21 @@ class TestHighLoadRateLimiting:
             assert allowed_requests_per_provider[provider_id] <= 50, \
                 f"Provider {provider_id} received {allowed_requests_per_provider[provider_id]} requests, expected <= 50"
 
-        # Total allowed requests should be <= 150 (50 * 3 providers)
+        # Total allowed requests should be <= 150 (50 * 3 providers); each provider
+        # receives 66+ requests within the frozen second, so every limit is reached
         total_allowed = sum(allowed_requests_per_provider.values())
-        assert total_allowed <= 150, \
-            f"Total allowed requests: {total_allowed}, expected <= 150"
+        assert total_allowed == 150, \
+            f"Total allowed requests: {total_allowed}, expected 150"
 
     @pytest.mark.performance
     @pytest.mark.asyncio
     async def test_global_rate_limiting_200_rps(self):
         """Test global rate limiting under 200 RPS input."""
-        mock_redis = AsyncMock()
+        mock_redis = FakeAsyncRedis()
         global_rate_limiter = GlobalRateLimiter(mock_redis, rate_limit=200, window=1)
 
         current_time = 1000.0
 
-        # Mock Redis INCR behavior
-        incr_count = 0
-
-        async def mock_incr(key):
-            nonlocal incr_count
-            incr_count += 1
-            return incr_count
-
-        async def mock_expire(key, seconds):
-            return True
-
-        mock_redis.incr = mock_incr
-        mock_redis.expire = mock_expire
-
         # Simulate 200 RPS (200 requests in 1 second)
         allowed_count = 0
 
@@ -120,23 +88,9 @@ class TestHighLoadRateLimiting:
     @pytest.mark.asyncio
     async def test_concurrent_rate_limiting_stress_test(self):
         """Stress test concurrent rate limiting operations."""
-        mock_redis = AsyncMock()
+        mock_redis = FakeAsyncRedis()
         rate_limiter = RateLimiter(mock_redis, rate_limit=50, window=1)
 
-        # Mock Redis behavior
-        request_counts = {"provider1": 0, "provider2": 0, "provider3": 0}
-
-        async def mock_incr(key):
-            provider = key.split(':')[1]
-            request_counts[provider] += 1
-            return request_counts[provider]
-
-        async def mock_expire(key, seconds):
-            return True
-
-        mock_redis.incr = mock_incr
-        mock_redis.expire = mock_expire
-
         # Create 300 concurrent requests (100 per provider)
         tasks = []
         current_time = 1000.0
@@ -169,17 +123,11 @@ class TestHighLoadRateLimiting:
     @pytest.mark.asyncio
     async def test_rate_limiter_latency_under_load(self):
         """Test rate limiter latency under high concurrent load."""
-        mock_redis = AsyncMock()
-
-        # Simple mock that returns quickly
-        async def mock_incr(key):
+        # A plain coroutine that returns quickly, without AsyncMock's call bookkeeping
+        async def mock_eval(script, numkeys, key, window):
             return 1
 
-        async def mock_expire(key, seconds):
-            return True
-
-        mock_redis.incr = mock_incr
-        mock_redis.expire = mock_expire
+        mock_redis = SimpleNamespace(eval=mock_eval)
 
         rate_limiter = RateLimiter(mock_redis, rate_limit=50, window=1)
 
@@ -249,30 +197,24 @@ class TestSlidingWindowAccuracy:
     @pytest.mark.asyncio
     async def test_sliding_window_precision(self):
         """Test that sliding window provides accurate rate limiting."""
-        mock_redis = AsyncMock()
-        rate_limiter = RateLimiter(mock_redis, rate_limit=5, window=1)
-
-        # Track calls to Redis INCR
+        # Track the keys counted by the INCR script
         incr_history = []
 
-        async def mock_incr(key):
+        async def mock_eval(script, numkeys, key, window):
             incr_history.append(key)
             # Return incrementing values for each provider
             provider = key.split(':')[1]
-            if not hasattr(mock_incr, 'counts'):
-                mock_incr.counts = {}
+            if not hasattr(mock_eval, 'counts'):
+                mock_eval.counts = {}
 
-            if provider not in mock_incr.counts:
-                mock_incr.counts[provider] = 0
+            if provider not in mock_eval.counts:
+                mock_eval.counts[provider] = 0
 
-            mock_incr.counts[provider] += 1
-            return mock_incr.counts[provider]
+            mock_eval.counts[provider] += 1
+            return mock_eval.counts[provider]
 
-        async def mock_expire(key, seconds):
-            return True
-
-        mock_redis.incr = mock_incr
-        mock_redis.expire = mock_expire
+        mock_redis = SimpleNamespace(eval=mock_eval)
+        rate_limiter = RateLimiter(mock_redis, rate_limit=5, window=1)
 
         current_time = 1000.0
 
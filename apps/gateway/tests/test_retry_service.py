@@ -10,8 +10,6 @@ from unittest.mock import AsyncMock, MagicMock, patch
 from datetime import datetime
 
 import pytest
-from redis.asyncio import Redis
-from sqlmodel import Session
 
 from src.retry_service import RetryService, ProviderStatus
 from src.health_tracker import ProviderHealthTracker
@@ -20,14 +18,14 @@ from src.health_tracker import ProviderHealthTracker
 @pytest.fixture
 def mock_redis():
     """Create mock Redis client."""
-    redis = AsyncMock(spec=Redis)
+    redis = AsyncMock()
     return redis
 
 
 @pytest.fixture
 def mock_db_session():
     """Create mock database session."""
-    session = MagicMock(spec=Session)
+    session = MagicMock()
     return session
 
 
@@ -297,6 +295,16 @@ class TestProviderManagement:
         provider4 = await retry_service.select_provider_round_robin()
         assert provider4 == "provider1"
 
+    @pytest.mark.asyncio
+    async def test_reset_state_restarts_round_robin(self, retry_service, mock_health_tracker):
+        """Test reset_state restarts round-robin selection from the first provider."""
+        mock_health_tracker.is_provider_healthy.side_effect = lambda *_: True
+        await retry_service.select_provider_round_robin()
+
+        retry_service.reset_state()
+
+        assert await retry_service.select_provider_round_robin() == "provider1"
+
     @pytest.mark.asyncio
     async def test_select_provider_round_robin_with_exclusions(
         self, retry_service, mock_health_tracker
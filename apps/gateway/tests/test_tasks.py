@@ -2,8 +2,13 @@
 Tests for Taskiq tasks and SMS processing.
 """
 
+import asyncio
+import json
+from functools import partial
+from typing import Callable, List, Optional
 from unittest.mock import AsyncMock, MagicMock, patch
 
+import httpx
 import pytest
 
 from src.tasks import (
@@ -14,6 +19,23 @@ from src.tasks import (
 )
 
 
+class ProviderStub:
+    """Stand-in SMS provider served to the task's httpx client through httpx.MockTransport."""
+
+    def __init__(self):
+        self.handler: Optional[Callable[[httpx.Request], httpx.Response]] = None
+        self.requests: List[httpx.Request] = []
+        self.transport = httpx.MockTransport(self._handle)
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        return self.handler(request)
+
+    def reset(self) -> None:
+        self.handler = None
+        self.requests.clear()
+
+
 @pytest.fixture
 def mock_rate_limiter():
     """Create mock rate limiter."""
@@ -30,47 +52,59 @@ def mock_global_rate_limiter():
     return limiter
 
 
+@pytest.fixture(scope="module", autouse=True)
+def provider_stub():
+    """Route provider HTTP calls through one MockTransport for the whole module."""
+    stub = ProviderStub()
+    # Bind the stub transport into every client the task module constructs
+    client_factory = partial(httpx.AsyncClient, transport=stub.transport)
+    with patch("src.tasks.httpx.AsyncClient", client_factory):
+        yield stub
+
+
+@pytest.fixture
+def mock_provider(provider_stub):
+    """Module-wide provider stub, cleared of earlier tests' handler and requests."""
+    provider_stub.reset()
+    return provider_stub
+
+
 class TestSendSMSToProvider:
     """Test SMS sending task."""
 
     @pytest.mark.asyncio
-    async def test_send_sms_success(self):
+    async def test_send_sms_success(self, mock_provider):
         """Test successful SMS sending."""
         # Mock successful HTTP response
-        mock_response = AsyncMock()
-        mock_response.status_code = 200
-        mock_response.json.return_value = {
-            "success": True,
-            "message_id": "msg_123"
-        }
-
-        with patch('httpx.AsyncClient.post') as mock_post:
-            mock_post.return_value = mock_response
-
-            result = await send_sms_to_provider(
-                provider_url="http://provider1:8071/api/sms",
-                phone="01921317475",
-                text="Hello World!",
-                message_id="msg_123",
-                provider_id="provider1"
-            )
-
-            assert result["success"] is True
-            assert result["message_id"] == "msg_123"
-            assert result["provider"] == "provider1"
+        mock_provider.handler = lambda request: httpx.Response(200, json={"success": True, "message_id": "msg_123"})
+
+        result = await send_sms_to_provider(
+            provider_url="http://provider1:8071/api/sms",
+            phone="01921317475",
+            text="Hello World!",
+            message_id="msg_123",
+            provider_id="provider1"
+        )
+
+        assert result["success"] is True
+        assert result["message_id"] == "msg_123"
+        assert result["provider"] == "provider1"
+        assert result["response"] == {"success": True, "message_id": "msg_123"}
+        # The request was built by real httpx, so the payload is checked as sent
+        (request,) = mock_provider.requests
+        assert request.url == "http://provider1:8071/api/sms"
+        assert json.loads(request.content) == {"phone": "01921317475", "text": "Hello World!"}
 
     @pytest.mark.asyncio
-    async def test_send_sms_timeout_schedules_retry(self):
+    async def test_send_sms_timeout_schedules_retry(self, mock_provider):
         """On timeout, the task should schedule a retry via dispatch task, not retry HTTP inline."""
         # Mock timeout exception specific to httpx
-        import httpx
+        def time_out(request):
+            raise httpx.TimeoutException("Timeout", request=request)
 
-        timeout_exception = httpx.TimeoutException("Timeout")
+        mock_provider.handler = time_out
 
-        with (
-            patch("httpx.AsyncClient.post", side_effect=timeout_exception) as mock_post,
-            patch("src.tasks.dispatch_sms") as mock_dispatch_task,
-        ):
+        with patch("src.tasks.dispatch_sms") as mock_dispatch_task:
             # Mock the kiq().schedule_by_time chain
             mock_task = AsyncMock()
             mock_task.schedule_by_time = AsyncMock()
@@ -86,25 +120,20 @@ class TestSendSMSToProvider:
             )
 
             # Only one HTTP attempt happened
-            assert mock_post.call_count == 1
+            assert len(mock_provider.requests) == 1
             # Retry scheduled through dispatch task
             assert result["success"] is False
             assert result.get("retry_scheduled") is True
             assert mock_dispatch_task.kiq.called
 
     @pytest.mark.asyncio
-    async def test_send_sms_max_retries_exceeded(self):
+    async def test_send_sms_max_retries_exceeded(self, mock_provider):
         """Test SMS failure after max retries returns error without scheduling."""
         # Mock persistent failure
-        mock_response = AsyncMock()
-        mock_response.status_code = 500
-        mock_response.text = "Internal Server Error"
-        with (
-            patch("httpx.AsyncClient.post", return_value=mock_response),
-            patch(
-                "src.tasks.dispatch_sms.kiq", new_callable=AsyncMock
-            ) as mock_dispatch_kiq,
-        ):
+        mock_provider.handler = lambda request: httpx.Response(500, text="Internal Server Error")
+        with patch(
+            "src.tasks.dispatch_sms.kiq", new_callable=AsyncMock
+        ) as mock_dispatch_kiq:
             result = await send_sms_to_provider(
                 provider_url="http://provider1:8071/api/sms",
                 phone="01921317475",
@@ -120,6 +149,39 @@ class TestSendSMSToProvider:
             # No scheduling when max retries already reached
             assert not mock_dispatch_kiq.called
 
+    @pytest.mark.asyncio
+    async def test_send_sms_concurrent_messages(self, mock_provider):
+        """Test concurrent sends each get their own provider outcome and health record."""
+        # Odd-numbered messages fail; responses are built up front and looked up by the
+        # payload's text, so dispatch is O(1) and independent of completion order
+        messages = [("01921317475", f"Health check {i}") for i in range(5)]
+        responses_by_text = {
+            text: httpx.Response(500, text="Internal Server Error") if i % 2 else httpx.Response(200, json={"success": True})
+            for i, (_, text) in enumerate(messages)
+        }
+
+        health_tracker = AsyncMock()
+        semaphore = asyncio.Semaphore(4)
+
+        async def send_one(index, phone, text):
+            async with semaphore:
+                return await send_sms_to_provider(
+                    provider_url="http://provider1:8071/api/sms",
+                    phone=phone,
+                    text=text,
+                    message_id=f"msg_{index}",
+                    provider_id="provider1",
+                    retry_count=5,  # At max retries, so failures are recorded instead of rescheduled
+                    health_tracker=health_tracker,
+                )
+
+        mock_provider.handler = lambda request: responses_by_text[json.loads(request.content)["text"]]
+        results = await asyncio.gather(*(send_one(i, phone, text) for i, (phone, text) in enumerate(messages)))
+
+        assert [result["success"] for result in results] == [True, False, True, False, True]
+        assert [result["message_id"] for result in results] == [f"msg_{i}" for i in range(5)]
+        assert health_tracker.record_success.await_count == 3
+        assert health_tracker.record_failure.await_count == 2
 
 class TestProcessSMSBatch:
     """Test SMS batch processing."""